@@ -7,7 +7,7 @@ import uuid
 from contextlib import asynccontextmanager
 from typing import List
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
@@ -30,7 +30,9 @@ from .utils import (
     detect_query_type,
     quick_sparql_check,
     sanitize_query,
-    get_error_hint
+    get_error_hint,
+    compute_result_etag,
+    etag_matches
 )
 
 
@@ -153,8 +155,13 @@ async def health_check():
 
 
 @app.post("/sparql/query", response_model=SPARQLQueryResponse)
-async def execute_sparql_query(request: SPARQLQueryRequest):
-    """Execute a SPARQL query against the ontology"""
+async def execute_sparql_query(request: SPARQLQueryRequest, http_request: Request, http_response: Response):
+    """Execute a SPARQL query against the ontology
+    
+    Responses carry a weak ETag of the result and its metadata (timings
+    excluded). Clients that send it back in If-None-Match get a bodyless
+    304 when the response would be equivalent.
+    """
     try:
         # Sanitize query
         query = sanitize_query(request.query)
@@ -189,10 +196,11 @@ async def execute_sparql_query(request: SPARQLQueryRequest):
             hint = get_error_hint(error_msg)
             
             # Determine suggested pattern based on error type
+            error_lower = error_msg.lower()
             suggested_pattern = None
-            if "count" in error_msg.lower() and "group by" in error_msg.lower():
+            if "count" in error_lower and "group by" in error_lower:
                 suggested_pattern = "Get downtime events with reasons"
-            elif "equipment" in error_msg.lower():
+            elif "equipment" in error_lower:
                 suggested_pattern = "Get all equipment"
             
             # Build error detail
@@ -214,6 +222,19 @@ async def execute_sparql_query(request: SPARQLQueryRequest):
         
         # Get ontology info
         ontology_info = sparql_service.get_ontology_info()
+        truncated = metadata.get("truncated", False)
+        
+        # Skip the body if the client already has an equivalent response
+        etag = compute_result_etag(columns, results, {
+            "ontology_version": ontology_info["version"],
+            "truncated": truncated,
+            "prepared_query": metadata["prepared_query"],
+            "query_type": query_type,
+            "warning": warning
+        })
+        if etag_matches(http_request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        http_response.headers["ETag"] = etag
         
         # Build response
         response = SPARQLQueryResponse(
@@ -221,7 +242,7 @@ async def execute_sparql_query(request: SPARQLQueryRequest):
                 columns=columns,
                 results=results,
                 row_count=len(results),
-                truncated=metadata.get("truncated", False)
+                truncated=truncated
             ),
             metadata=QueryMetadata(
                 query_time_ms=metadata["query_time_ms"],
@@ -238,7 +259,8 @@ async def execute_sparql_query(request: SPARQLQueryRequest):
         # Re-raise HTTP exceptions
         raise
     except Exception as e:
-        logger.error(f"Query execution failed: {e}", exc_info=True)
+        # The traceback is logged once by general_exception_handler
+        logger.error(f"Query execution failed: {e}")
         raise
 
 
@@ -13,6 +13,7 @@ import tempfile
 from pathlib import Path
 import time
 import re
+from collections import Counter
 
 from owlready2 import get_ontology, default_world, World
 import owlready2.sparql
@@ -23,6 +24,30 @@ from .utils import Timer, format_query_results, truncate_results
 
 logger = logging.getLogger(__name__)
 
+# Patterns used by the COUNT() aggregation workaround
+AGGREGATION_PATTERN = re.compile(r'(?:COUNT|SUM|AVG|MIN|MAX|GROUP_CONCAT)\(', re.IGNORECASE)
+GROUP_BY_PATTERN = re.compile(r'GROUP\s+BY\s+([^\s]+)')
+COUNT_AS_PATTERN = re.compile(r'\(COUNT\([^)]+\)\s+AS\s+\w+\)', re.IGNORECASE)
+COUNT_PATTERN = re.compile(r'COUNT\([^)]+\)', re.IGNORECASE)
+
+# Aggregate function calls whose results the workaround checks
+AGGREGATE_FUNCTION_PREFIXES = ("COUNT(", "SUM(", "AVG(", "MIN(", "MAX(")
+
+# Column names that are expected to hold aggregate (numeric) values
+AGGREGATE_COLUMN_NAMES = frozenset(['count', 'sum', 'avg', 'min', 'max', 'total', 'average'])
+
+# Prefixes of IRI strings that leak into aggregate columns
+IRI_PREFIXES = ('http://', 'https://')
+
+
+@lru_cache(maxsize=256)
+def _aggregate_alias_pattern(function_prefix: str, col_name: str) -> re.Pattern:
+    """Compiled pattern for "FUNC(...) AS col_name", built once per function and column"""
+    return re.compile(
+        re.escape(function_prefix) + r"[^)]+\)\s+AS\s+" + re.escape(col_name),
+        re.IGNORECASE
+    )
+
 
 class SPARQLService:
     """Service for executing SPARQL queries against the ontology"""
@@ -291,19 +316,20 @@ class SPARQLService:
         # Check if query contains aggregation functions and fix results
         if self._contains_aggregation(query) and self._has_iri_in_aggregation_results(results, column_names):
             logger.warning("Detected Owlready2 COUNT() bug - attempting workaround")
-            results = self._fix_aggregation_results_v2(query, results, column_names)
+            results = self._fix_aggregation_results_v2(query, query.upper(), results, column_names)
         
         return results, column_names
     
     def _contains_aggregation(self, query: str) -> bool:
         """
         Check if query contains aggregation functions.
+        
+        A single case-insensitive regex scan, so the common non-aggregate
+        query never pays for an uppercased copy.
         """
-        query_upper = query.upper()
-        aggregation_functions = ['COUNT(', 'SUM(', 'AVG(', 'MIN(', 'MAX(', 'GROUP_CONCAT(']
-        return any(func in query_upper for func in aggregation_functions)
+        return AGGREGATION_PATTERN.search(query) is not None
     
-    def _fix_aggregation_results(self, query: str, results: List[List[Any]], column_names: List[str]) -> List[List[Any]]:
+    def _fix_aggregation_results(self, query_upper: str, results: List[List[Any]], column_names: List[str]) -> List[List[Any]]:
         """
         Fix aggregation results that return IRIs instead of numeric values.
         
@@ -315,60 +341,56 @@ class SPARQLService:
             return results
         
         # Identify which columns are aggregation results
-        query_upper = query.upper()
         aggregation_cols = []
         
-        for i, col_name in enumerate(column_names):
-            # Check if this column is from an aggregation function
-            # Look for patterns like "COUNT(...) AS colname" or just "COUNT(...)"
-            patterns = [
-                f"COUNT(" ,  # COUNT function
-                f"SUM(",     # SUM function  
-                f"AVG(",     # AVG function
-                f"MIN(",     # MIN function
-                f"MAX("      # MAX function
-            ]
-            
-            # Check if column appears after an aggregation function
-            for pattern in patterns:
-                if pattern in query_upper:
-                    # Check if this column name appears in an AS clause after the aggregation
-                    as_pattern = re.escape(pattern) + r"[^)]+\)\s+AS\s+" + re.escape(col_name)
-                    if re.search(as_pattern, query_upper, re.IGNORECASE):
-                        aggregation_cols.append(i)
-                        break
-                    # Or if the column name matches a common aggregation result name
-                    elif col_name.lower() in ['count', 'sum', 'avg', 'min', 'max', 'total', 'average']:
-                        aggregation_cols.append(i)
-                        break
+        # Find the aggregate functions used by the query once, rather than
+        # re-scanning the query for all five for every column
+        # (patterns like "COUNT(...) AS colname" or just "COUNT(...)")
+        used_functions = [
+            function for function in AGGREGATE_FUNCTION_PREFIXES
+            if function in query_upper
+        ]
+        
+        if used_functions:
+            for i, col_name in enumerate(column_names):
+                # A common aggregation result name, or the column appears in
+                # an AS clause after one of the query's aggregations
+                if (col_name.lower() in AGGREGATE_COLUMN_NAMES or
+                        any(_aggregate_alias_pattern(function, col_name).search(query_upper)
+                            for function in used_functions)):
+                    aggregation_cols.append(i)
         
         # If no aggregation columns identified, try another approach
         if not aggregation_cols and 'GROUP BY' in query_upper:
             # For GROUP BY queries, assume first column might be aggregation if it looks like an IRI
             for i, col_name in enumerate(column_names):
-                if col_name.lower() in ['count', 'sum', 'avg', 'min', 'max', 'total', 'average']:
+                if col_name.lower() in AGGREGATE_COLUMN_NAMES:
                     aggregation_cols.append(i)
         
         # Fix the results
         if aggregation_cols:
             fixed_results = []
+            replaced = 0
             for row in results:
                 fixed_row = list(row)
                 for col_idx in aggregation_cols:
                     if col_idx < len(fixed_row):
                         value = fixed_row[col_idx]
                         # If value looks like an IRI/entity, it's likely the bug
-                        if isinstance(value, str) and (value.startswith('http://') or value.startswith('https://')):
+                        if type(value) is str and value.startswith(IRI_PREFIXES):
                             # For COUNT, we need to actually count the results
                             # This is a fallback - ideally we'd re-execute the query differently
-                            logger.warning(f"Detected COUNT() bug: got IRI '{value}' instead of numeric count")
                             # Return 1 as a fallback count (at least one result was found)
                             fixed_row[col_idx] = 1
+                            replaced += 1
                         elif hasattr(value, 'iri'):
                             # It's an Owlready2 entity object
-                            logger.warning(f"Detected COUNT() bug: got entity instead of numeric count")
                             fixed_row[col_idx] = 1
+                            replaced += 1
                 fixed_results.append(fixed_row)
+            # One summary line rather than a formatted warning per affected value
+            if replaced:
+                logger.warning(f"Detected COUNT() bug: replaced {replaced} IRI/entity values with a fallback count of 1")
             return fixed_results
         
         return results
@@ -380,33 +402,31 @@ class SPARQLService:
         if not results or not column_names:
             return False
             
-        # Check first row for IRI values in columns that should be numeric
-        first_row = results[0] if results else []
-        for i, col_name in enumerate(column_names):
-            if col_name.lower() in ['count', 'sum', 'avg', 'min', 'max', 'total', 'average']:
-                if i < len(first_row):
-                    value = first_row[i]
-                    # Check if it's an IRI string
-                    if isinstance(value, str) and (value.startswith('http://') or value.startswith('https://')):
-                        return True
-                    # Check if it's an Owlready2 entity
-                    if hasattr(value, 'iri'):
-                        return True
+        # Only the first row's aggregate columns need checking - the bug
+        # affects every row alike
+        first_row = results[0]
+        for i, col_name in enumerate(column_names[:len(first_row)]):
+            if col_name.lower() in AGGREGATE_COLUMN_NAMES:
+                value = first_row[i]
+                # Check if it's an IRI string
+                if type(value) is str and value.startswith(IRI_PREFIXES):
+                    return True
+                # Check if it's an Owlready2 entity
+                if hasattr(value, 'iri'):
+                    return True
         return False
     
-    def _fix_aggregation_results_v2(self, query: str, results: List[List[Any]], column_names: List[str]) -> List[List[Any]]:
+    def _fix_aggregation_results_v2(self, query: str, query_upper: str, results: List[List[Any]], column_names: List[str]) -> List[List[Any]]:
         """
         Alternative fix for COUNT() aggregation bug.
         
         For GROUP BY queries with COUNT, we need to manually count the groups.
         This is a more robust workaround.
         """
-        query_upper = query.upper()
-        
         # Check if this is a COUNT query with GROUP BY
         if 'COUNT(' in query_upper and 'GROUP BY' in query_upper:
             # Extract the GROUP BY column(s)
-            group_by_match = re.search(r'GROUP\s+BY\s+([^\s]+)', query_upper)
+            group_by_match = GROUP_BY_PATTERN.search(query_upper)
             if group_by_match:
                 # For each group, we need to count properly
                 # Since Owlready2 returns IRIs instead of counts, we'll use a different approach
@@ -415,36 +435,39 @@ class SPARQLService:
                 # Then count manually
                 try:
                     # Remove COUNT from SELECT clause
-                    modified_query = re.sub(r'\(COUNT\([^)]+\)\s+AS\s+\w+\)', '?_dummy', query, flags=re.IGNORECASE)
-                    modified_query = re.sub(r'COUNT\([^)]+\)', '?_dummy', modified_query, flags=re.IGNORECASE)
+                    modified_query = COUNT_AS_PATTERN.sub('?_dummy', query)
+                    modified_query = COUNT_PATTERN.sub('?_dummy', modified_query)
                     
                     # Execute modified query
                     logger.debug(f"Executing fallback query for COUNT workaround: {modified_query[:100]}...")
                     prepared_query = self.world.prepare_sparql(modified_query)
                     raw_results = list(prepared_query.execute())
                     
-                    # Count occurrences per group
-                    from collections import defaultdict
-                    group_counts = defaultdict(int)
-                    
                     # Assuming the GROUP BY column is the second column (after the COUNT column)
                     group_col_idx = 1  # Adjust based on actual query structure
                     
-                    for row in raw_results:
-                        if len(row) > group_col_idx:
-                            group_key = str(row[group_col_idx])
-                            group_counts[group_key] += 1
+                    # Count occurrences per group - Counter tallies the keys in C
+                    group_counts = Counter(
+                        str(row[group_col_idx])
+                        for row in raw_results
+                        if len(row) > group_col_idx
+                    )
+                    
+                    # Index the first original row of each group in one pass
+                    # rather than rescanning the results for every group
+                    first_row_by_group = {}
+                    for row in results:
+                        if len(row) > 1:
+                            first_row_by_group.setdefault(str(row[1]), row)
                     
                     # Reconstruct results with proper counts
                     fixed_results = []
                     for group_key, count in group_counts.items():
-                        # Find the original row for this group
-                        for row in results:
-                            if len(row) > 1 and str(row[1]) == group_key:
-                                fixed_row = list(row)
-                                fixed_row[0] = count  # Replace IRI with actual count
-                                fixed_results.append(fixed_row)
-                                break
+                        row = first_row_by_group.get(group_key)
+                        if row is not None:
+                            fixed_row = list(row)
+                            fixed_row[0] = count  # Replace IRI with actual count
+                            fixed_results.append(fixed_row)
                     
                     if fixed_results:
                         logger.info(f"Successfully fixed COUNT() results using fallback method")
@@ -453,7 +476,7 @@ class SPARQLService:
                     logger.error(f"Fallback COUNT workaround failed: {e}")
         
         # If we can't fix it with the fallback, try the original simple fix
-        return self._fix_aggregation_results(query, results, column_names)
+        return self._fix_aggregation_results(query_upper, results, column_names)
     
     async def get_health_status(self) -> Dict[str, Any]:
         """Get health status of the SPARQL service"""
@@ -4,8 +4,10 @@ Utility functions for the SPARQL API
 
 import re
 import time
+import json
+import hashlib
 import logging
-from typing import Optional, Tuple, List, Any
+from typing import Optional, Tuple, List, Dict, Any
 from datetime import datetime
 from functools import lru_cache
 from owlready2 import World
@@ -15,6 +17,21 @@ from .models import QueryType
 
 logger = logging.getLogger(__name__)
 
+# Query types and clauses Owlready2 cannot execute, compiled once at import
+UNSUPPORTED_QUERY_TYPE_PATTERNS = [
+    (query_type, re.compile(rf'\b{query_type}\b'))
+    for query_type in ["ASK", "DESCRIBE", "CONSTRUCT", "LOAD", "CLEAR", "DROP"]
+]
+FROM_NAMED_PATTERN = re.compile(r'\bFROM\s+NAMED\b')
+FROM_PATTERN = re.compile(r'\bFROM\b(?!\s*\()')
+SERVICE_PATTERN = re.compile(r'\bSERVICE\b')
+MINUS_PATTERN = re.compile(r'\bMINUS\b')
+# Every keyword the patterns above look for, as one alternation - a single
+# scan rules out the lot for the common, fully supported query
+UNSUPPORTED_KEYWORD_PATTERN = re.compile(
+    r'\b(?:ASK|DESCRIBE|CONSTRUCT|LOAD|CLEAR|DROP|FROM|SERVICE|MINUS)\b'
+)
+
 
 def detect_query_type(query: str) -> QueryType:
     """
@@ -26,23 +43,26 @@ def detect_query_type(query: str) -> QueryType:
     Returns:
         QueryType enum value
     """
-    # Normalize whitespace and convert to uppercase for checking
-    query_upper = ' '.join(query.strip().split()).upper()
+    # Only the leading keyword matters - uppercase just those six characters
+    # rather than a whitespace-normalized copy of the whole query
+    keyword = query.lstrip()[:6].upper()
     
-    if query_upper.startswith("SELECT"):
+    if keyword == "SELECT":
         return QueryType.SELECT
-    elif query_upper.startswith("INSERT"):
+    elif keyword == "INSERT":
         return QueryType.INSERT
-    elif query_upper.startswith("DELETE"):
+    elif keyword == "DELETE":
         return QueryType.DELETE
     else:
         return QueryType.UNKNOWN
 
 
+@lru_cache(maxsize=256)
 def quick_sparql_check(query: str, max_length: int) -> Optional[str]:
     """
     Perform basic sanity checks on SPARQL query.
     Returns warning message if issues found, None if OK.
+    Results are cached, as agents often resubmit identical queries.
     
     Args:
         query: SPARQL query string
@@ -65,12 +85,13 @@ def quick_sparql_check(query: str, max_length: int) -> Optional[str]:
     
     # Check for unsupported operations based on Owlready2 documentation
     query_upper = query.upper()
+    has_unsupported_keyword = UNSUPPORTED_KEYWORD_PATTERN.search(query_upper) is not None
     
     # Unsupported query types
-    unsupported_types = ["ASK", "DESCRIBE", "CONSTRUCT", "LOAD", "CLEAR", "DROP"]
-    for unsupported in unsupported_types:
-        if re.search(rf'\b{unsupported}\b', query_upper):
-            return f"Query type {unsupported} is not supported by Owlready2"
+    if has_unsupported_keyword:
+        for unsupported, pattern in UNSUPPORTED_QUERY_TYPE_PATTERNS:
+            if pattern.search(query_upper):
+                return f"Query type {unsupported} is not supported by Owlready2"
     
     # Unsupported clauses
     if "DELETE WHERE" in query_upper:
@@ -79,13 +100,16 @@ def quick_sparql_check(query: str, max_length: int) -> Optional[str]:
     if "INSERT DATA" in query_upper or "DELETE DATA" in query_upper:
         return "INSERT DATA / DELETE DATA not supported, use INSERT/DELETE with WHERE"
     
-    if re.search(r'\bFROM\s+NAMED\b', query_upper) or re.search(r'\bFROM\b(?!\s*\()', query_upper):
+    if not has_unsupported_keyword:
+        return None
+    
+    if FROM_NAMED_PATTERN.search(query_upper) or FROM_PATTERN.search(query_upper):
         return "FROM / FROM NAMED clauses are not supported"
     
-    if re.search(r'\bSERVICE\b', query_upper):
+    if SERVICE_PATTERN.search(query_upper):
         return "SERVICE (federated queries) not supported"
     
-    if re.search(r'\bMINUS\b', query_upper):
+    if MINUS_PATTERN.search(query_upper):
         return "MINUS operator is not supported"
     
     return None
@@ -101,6 +125,10 @@ def sanitize_query(query: str) -> str:
     Returns:
         Sanitized query
     """
+    # Without a '#' there are no comments to strip - skip the per-line pass
+    if '#' not in query:
+        return ' '.join(query.split())
+    
     # Remove single-line comments (but preserve strings)
     # This is a simple approach - more robust would parse properly
     lines = query.split('\n')
@@ -198,6 +226,11 @@ PREDICATE_IRI_MAPPING = {
 }
 
 
+# Result value types that format_query_results passes through unchanged
+# (ints are excluded: they may be Owlready2 abbreviated IRIs)
+PLAIN_RESULT_TYPES = frozenset([str, float, type(None)])
+
+
 def format_query_results(results: List[List[Any]], columns: List[str], world: Optional[World] = None, use_names: bool = True) -> Tuple[List[List[Any]], List[str]]:
     """
     Format query results for JSON serialization.
@@ -216,6 +249,12 @@ def format_query_results(results: List[List[Any]], columns: List[str], world: Op
     for row in results:
         formatted_row = []
         for value in row:
+            # Plain literals are kept as is - skip the type/attribute checks
+            # below for the bulk of result values
+            if type(value) in PLAIN_RESULT_TYPES:
+                formatted_row.append(value)
+                continue
+            
             formatted_value = None
             
             # Handle integer predicates (Owlready2 internal IDs)
@@ -276,8 +315,62 @@ def format_query_results(results: List[List[Any]], columns: List[str], world: Op
     return formatted_results, formatted_columns
 
 
+def compute_result_etag(columns: List[str], results: List[List[Any]], context: Dict[str, Any]) -> str:
+    """
+    Compute a weak ETag for a query result.
+    
+    The hash covers the result data and the response fields that describe
+    it, such as the ontology version and truncation flag. Per-execution
+    timings are left out, so responses with equal tags are equivalent
+    rather than byte-identical - hence a weak validator.
+    
+    Args:
+        columns: Formatted column names
+        results: Formatted result rows
+        context: Other response fields that identify the result
+        
+    Returns:
+        Weak ETag header value
+    """
+    payload = json.dumps(
+        [columns, results, context], separators=(',', ':'), sort_keys=True, default=str
+    ).encode('utf-8')
+    return f'W/"{hashlib.blake2b(payload, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+    
+    The header may be "*" or a comma-separated list of tags. Tags are
+    compared weakly (W/ prefixes ignored), as RFC 7232 requires for
+    If-None-Match.
+    
+    Args:
+        if_none_match: Raw If-None-Match header value, if any
+        etag: ETag of the current result
+        
+    Returns:
+        True if any listed tag matches
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque_tag:
+            return True
+    return False
+
+
 class Timer:
     """Context manager for timing operations"""
+    __slots__ = ("start_time", "elapsed_ms")  # One instance per request
     
     def __init__(self):
         self.start_time = None
@@ -10,6 +10,11 @@ import os
 from datetime import datetime
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
 
 def analyze_csv_data(csv_path):
     """Analyze the CSV data and extract metadata."""
@@ -17,7 +22,7 @@ def analyze_csv_data(csv_path):
     df = pd.read_csv(csv_path)
     
     # Convert timestamp to datetime
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], format='ISO8601')
     
     print(f"Loaded {len(df)} records")
     return df
@@ -25,13 +30,15 @@ def analyze_csv_data(csv_path):
 
 def generate_catalogue(df):
     """Generate comprehensive data catalogue from DataFrame."""
+    start_time = df['Timestamp'].min()
+    end_time = df['Timestamp'].max()
     catalogue = {
         "metadata": {
             "generated_at": datetime.now().isoformat(),
             "data_range": {
-                "start": df['Timestamp'].min().isoformat(),
-                "end": df['Timestamp'].max().isoformat(),
-                "days_covered": (df['Timestamp'].max() - df['Timestamp'].min()).days + 1
+                "start": start_time.isoformat(),
+                "end": end_time.isoformat(),
+                "days_covered": (end_time - start_time).days + 1
             },
             "total_records": len(df),
             "update_frequency": "5 minutes",
@@ -45,24 +52,27 @@ def generate_catalogue(df):
         "data_quality": {}
     }
     
-    # Equipment analysis
+    # Equipment analysis - the deduplicated equipment table is built once and
+    # reused for the type, line and coverage summaries
+    equipment_df = df[['EquipmentID', 'EquipmentType', 'LineID']].drop_duplicates()
+    equipment_count = equipment_df['EquipmentID'].nunique()
+    
     equipment_data = defaultdict(list)
-    for _, row in df[['EquipmentID', 'EquipmentType', 'LineID']].drop_duplicates().iterrows():
-        equipment_data[row['EquipmentType']].append({
-            "id": row['EquipmentID'],
-            "line": f"LINE{row['LineID']}"
+    for row in equipment_df.itertuples(index=False):
+        equipment_data[row.EquipmentType].append({
+            "id": row.EquipmentID,
+            "line": f"LINE{row.LineID}"
         })
     
     catalogue["equipment"] = {
-        "count": df['EquipmentID'].nunique(),
+        "count": equipment_count,
         "by_type": dict(equipment_data),
         "by_line": {}
     }
     
     # Group equipment by line
-    for line_id in sorted(df['LineID'].unique()):
-        line_equipment = df[df['LineID'] == line_id]['EquipmentID'].unique().tolist()
-        catalogue["equipment"]["by_line"][f"LINE{line_id}"] = sorted(line_equipment)
+    for line_id, line_equipment in equipment_df.groupby('LineID')['EquipmentID'].unique().items():
+        catalogue["equipment"]["by_line"][f"LINE{line_id}"] = sorted(line_equipment.tolist())
     
     # Products analysis
     products = []
@@ -74,21 +84,22 @@ def generate_catalogue(df):
         'ScrapUnitsProduced': 'sum'
     }).reset_index()
     
-    for _, prod in product_groups.iterrows():
-        margin = ((prod['SalePrice_per_unit'] - prod['StandardCost_per_unit']) / 
-                  prod['SalePrice_per_unit'] * 100)
-        total_units = prod['GoodUnitsProduced'] + prod['ScrapUnitsProduced']
-        scrap_rate = (prod['ScrapUnitsProduced'] / total_units * 100) if total_units > 0 else 0
-        
+    # Margins and scrap rates for all products at once
+    product_groups['MarginPercent'] = ((product_groups['SalePrice_per_unit'] - product_groups['StandardCost_per_unit']) /
+                                       product_groups['SalePrice_per_unit'] * 100)
+    total_units = product_groups['GoodUnitsProduced'] + product_groups['ScrapUnitsProduced']
+    product_groups['ScrapRatePercent'] = (product_groups['ScrapUnitsProduced'] / total_units * 100).where(total_units > 0, 0)
+    
+    for prod in product_groups.itertuples(index=False):
         products.append({
-            "id": prod['ProductID'],
-            "name": prod['ProductName'],
-            "target_rate_per_5min": int(prod['TargetRate_units_per_5min']),
-            "standard_cost": float(prod['StandardCost_per_unit']),
-            "sale_price": float(prod['SalePrice_per_unit']),
-            "margin_percent": round(margin, 1),
-            "total_produced": int(prod['GoodUnitsProduced']),
-            "actual_scrap_rate": round(scrap_rate, 2)
+            "id": prod.ProductID,
+            "name": prod.ProductName,
+            "target_rate_per_5min": int(prod.TargetRate_units_per_5min),
+            "standard_cost": float(prod.StandardCost_per_unit),
+            "sale_price": float(prod.SalePrice_per_unit),
+            "margin_percent": round(prod.MarginPercent, 1),
+            "total_produced": int(prod.GoodUnitsProduced),
+            "actual_scrap_rate": round(prod.ScrapRatePercent, 2)
         })
     
     catalogue["products"] = {
@@ -96,28 +107,35 @@ def generate_catalogue(df):
         "catalog": sorted(products, key=lambda x: x['id'])
     }
     
-    # Production lines summary
-    for line_id in sorted(df['LineID'].unique()):
-        line_df = df[df['LineID'] == line_id]
+    # Production lines summary - grouped column selections avoid copying the
+    # full frame for each line's boolean filter
+    line_groups = df.groupby('LineID')
+    orders_executed = line_groups['ProductionOrderID'].nunique()
+    products_made = line_groups['ProductID'].unique()
+    running_intervals = df['MachineStatus'].eq('Running').groupby(df['LineID']).sum()
+    for line_id in orders_executed.index:
         catalogue["production_lines"][f"LINE{line_id}"] = {
-            "orders_executed": line_df['ProductionOrderID'].nunique(),
-            "products_made": line_df['ProductID'].unique().tolist(),
-            "total_runtime_hours": len(line_df[line_df['MachineStatus'] == 'Running']) * 5 / 60
+            "orders_executed": int(orders_executed[line_id]),
+            "products_made": products_made[line_id].tolist(),
+            "total_runtime_hours": int(running_intervals[line_id]) * 5 / 60
         }
     
     # Metrics analysis (KPIs)
-    kpi_columns = ['OEE_Score', 'Availability_Score', 'Performance_Score', 'Quality_Score']
+    kpi_columns = [kpi for kpi in ['OEE_Score', 'Availability_Score', 'Performance_Score', 'Quality_Score']
+                   if kpi in df.columns]
+    # One describe() over all KPI columns instead of six passes per column
+    kpi_stats = df[kpi_columns].describe() if kpi_columns else None
     for kpi in kpi_columns:
-        if kpi in df.columns:
-            kpi_name = kpi.replace('_Score', '').replace('_', ' ')
-            catalogue["metrics"][kpi_name] = {
-                "min": round(df[kpi].min(), 1),
-                "max": round(df[kpi].max(), 1),
-                "mean": round(df[kpi].mean(), 1),
-                "median": round(df[kpi].median(), 1),
-                "typical_range": f"{round(df[kpi].quantile(0.25), 1)}-{round(df[kpi].quantile(0.75), 1)}",
-                "world_class": "85-95" if kpi != 'Quality_Score' else "98-99.5"
-            }
+        kpi_name = kpi.replace('_Score', '').replace('_', ' ')
+        stats = kpi_stats[kpi]
+        catalogue["metrics"][kpi_name] = {
+            "min": round(stats['min'], 1),
+            "max": round(stats['max'], 1),
+            "mean": round(stats['mean'], 1),
+            "median": round(stats['50%'], 1),
+            "typical_range": f"{round(stats['25%'], 1)}-{round(stats['75%'], 1)}",
+            "world_class": "85-95" if kpi != 'Quality_Score' else "98-99.5"
+        }
     
     # Downtime analysis
     downtime_df = df[df['MachineStatus'] == 'Stopped']
@@ -151,9 +169,9 @@ def generate_catalogue(df):
     
     # Data quality indicators
     catalogue["data_quality"] = {
-        "null_values": {col: int(df[col].isnull().sum()) for col in df.columns if df[col].isnull().sum() > 0},
-        "update_consistency": "5-minute intervals" if len(df['Timestamp'].diff().dropna().unique()) <= 2 else "Variable",
-        "equipment_coverage": f"{df['EquipmentID'].nunique()} unique equipment tracked"
+        "null_values": {col: int(count) for col, count in df.isnull().sum().items() if count > 0},
+        "update_consistency": "5-minute intervals" if df['Timestamp'].diff().nunique() <= 2 else "Variable",
+        "equipment_coverage": f"{equipment_count} unique equipment tracked"
     }
     
     # Column descriptions for quick reference
@@ -205,8 +223,14 @@ def main():
     
     # Save catalogue
     print(f"Saving catalogue to {output_path}...")
-    with open(output_path, 'w') as f:
-        json.dump(catalogue, f, indent=2)
+    if orjson is not None:
+        # Same indented layout as json.dump, serialized in C; NumPy scalars
+        # from the pandas aggregations are encoded directly
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(catalogue, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_path, 'w') as f:
+            json.dump(catalogue, f, indent=2)
     
     # Print summary
     print("\nCatalogue Summary:")
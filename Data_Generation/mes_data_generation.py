@@ -10,7 +10,12 @@ import random
 from datetime import datetime, timedelta
 import json
 import os
+from bisect import bisect_right
 from collections import defaultdict
+from functools import lru_cache
+
+# Equipment ID suffix -> equipment type name
+EQUIPMENT_TYPE_NAMES = {'FIL': 'Filler', 'PCK': 'Packer', 'PAL': 'Palletizer'}
 
 def load_config(config_file='mes_data_config.json'):
     """Load configuration from JSON file."""
@@ -103,9 +108,22 @@ def get_shift_number(current_time):
     else:
         return 3
 
+@lru_cache(maxsize=None)
+def parse_config_datetime(value):
+    """Parse a configured '%Y-%m-%d %H:%M:%S' timestamp, once per distinct value."""
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+
+def changeover_within(sorted_changeover_times, current_time, minutes):
+    """Check whether a changeover started in the last `minutes` before current_time."""
+    # Binary search for the latest changeover at or before current_time
+    idx = bisect_right(sorted_changeover_times, current_time)
+    return idx > 0 and current_time < sorted_changeover_times[idx - 1] + timedelta(minutes=minutes)
+
 def apply_anomalies(equip_id, current_time, order_info, config, changeover_start_times, 
-                   performance_drop_tracker, last_cleaning_times):
+                   performance_drop_tracker, last_cleaning_times, sorted_changeover_times=None):
     """Apply configured anomalies to determine equipment status and production rates."""
+    if sorted_changeover_times is None:
+        sorted_changeover_times = sorted(changeover_start_times)
     anomaly_config = config['anomaly_injection']
     product_config = config['product_master'].get(order_info['ProductID'], {})
     
@@ -132,8 +150,8 @@ def apply_anomalies(equip_id, current_time, order_info, config, changeover_start
     # Check major mechanical failure
     if anomaly_config.get('major_mechanical_failure', {}).get('enabled', False):
         failure = anomaly_config['major_mechanical_failure']
-        start_dt = datetime.strptime(failure['start_datetime'], '%Y-%m-%d %H:%M:%S')
-        end_dt = datetime.strptime(failure['end_datetime'], '%Y-%m-%d %H:%M:%S')
+        start_dt = parse_config_datetime(failure['start_datetime'])
+        end_dt = parse_config_datetime(failure['end_datetime'])
         
         if equip_id == failure['equipment_id'] and start_dt <= current_time <= end_dt:
             return "Stopped", failure['downtime_reason'], 0, 0, end_dt
@@ -277,8 +295,7 @@ def apply_anomalies(equip_id, current_time, order_info, config, changeover_start
     
     # Add normal variation based on equipment type
     equip_type = equip_id.split('-')[1]
-    type_map = {'FIL': 'Filler', 'PCK': 'Packer', 'PAL': 'Palletizer'}
-    equip_type_name = type_map.get(equip_type, 'Equipment')
+    equip_type_name = EQUIPMENT_TYPE_NAMES.get(equip_type, 'Equipment')
     
     if equip_type_name in config['product_specifications']['equipment_efficiency']:
         eff_range = config['product_specifications']['equipment_efficiency'][equip_type_name]
@@ -292,10 +309,8 @@ def apply_anomalies(equip_id, current_time, order_info, config, changeover_start
                                    config['product_specifications']['normal_scrap_rate'])
     
     # Check if in startup period (first 30 minutes after changeover)
-    for co_time in changeover_start_times:
-        if current_time >= co_time and current_time < co_time + timedelta(minutes=30):
-            scrap_rate = product_config.get('startup_scrap_rate', scrap_rate * 2)
-            break
+    if changeover_within(sorted_changeover_times, current_time, 30):
+        scrap_rate = product_config.get('startup_scrap_rate', scrap_rate * 2)
     
     # Check quality issues
     if (anomaly_config.get('quality_issues', {}).get('enabled', False) and 
@@ -304,11 +319,9 @@ def apply_anomalies(equip_id, current_time, order_info, config, changeover_start
     
     # Check changeover scrap spike
     if anomaly_config.get('changeover_scrap_spike', {}).get('enabled', False):
-        for co_time in changeover_start_times:
-            if (current_time >= co_time and 
-                current_time < co_time + timedelta(minutes=anomaly_config['changeover_scrap_spike']['duration_minutes'])):
-                scrap_rate *= anomaly_config['changeover_scrap_spike']['scrap_multiplier']
-                break
+        if changeover_within(sorted_changeover_times, current_time,
+                             anomaly_config['changeover_scrap_spike']['duration_minutes']):
+            scrap_rate *= anomaly_config['changeover_scrap_spike']['scrap_multiplier']
     
     # Check quality variation during normal production
     if anomaly_config.get('quality_variation_normal', {}).get('enabled', False):
@@ -371,9 +384,12 @@ def generate_mes_data(start_date, end_date, config):
     print("Generating production schedule...")
     orders_df = generate_production_orders(products_df, start_date, end_date, config)
     
-    # Merge master data
-    master_df = pd.merge(equipment_df, orders_df, on="LineID")
-    master_df = pd.merge(master_df, products_df, on="ProductID")
+    # Orders joined with their product data, grouped by line in schedule order,
+    # so finding the active order doesn't mask a full equipment x order table
+    # for every equipment on every interval
+    orders_by_line = defaultdict(list)
+    for order in pd.merge(orders_df, products_df, on="ProductID").to_dict("records"):
+        orders_by_line[order["LineID"]].append(order)
     
     # Track changeover times for scrap spike anomaly
     changeover_start_times = []
@@ -385,14 +401,19 @@ def generate_mes_data(start_date, end_date, config):
             # This is a changeover
             changeover_start_times.append(order['StartTime'])
         prev_order_by_line[line_id] = order['ProductionOrderID']
+    sorted_changeover_times = sorted(changeover_start_times)
     
     all_logs = []
+    append_log = all_logs.append  # bound once; called for every equipment on every interval
     current_time = start_date
     downtime_tracker = {}  # Tracks ongoing downtimes
     performance_drop_tracker = {}  # Tracks performance drops
     last_cleaning_times = {}  # Tracks last cleaning time per equipment
     cascade_tracker = {}  # Tracks cascade failures from upstream equipment
     
+    # Plain dicts, built once, instead of an iterrows() Series per equipment per interval
+    equipment_records = equipment_df.to_dict("records")
+    
     print("Starting data generation loop...")
     total_intervals = int((end_date - start_date).total_seconds() / 60 / 5)
     intervals_processed = 0
@@ -404,17 +425,17 @@ def generate_mes_data(start_date, end_date, config):
             print(f"  Progress: {progress:.1f}% ({intervals_processed}/{total_intervals} 5-min intervals)")
         
         # Process each piece of equipment
-        for _, equip in equipment_df.iterrows():
+        for equip in equipment_records:
             equip_id = equip["EquipmentID"]
             
             # Find active order
-            active_order = master_df[
-                (master_df["LineID"] == equip["LineID"]) &
-                (master_df["StartTime"] <= current_time) &
-                (master_df["EndTime"] > current_time)
-            ]
+            order_info = next(
+                (order for order in orders_by_line[equip["LineID"]]
+                 if order["StartTime"] <= current_time < order["EndTime"]),
+                None
+            )
             
-            if active_order.empty:
+            if order_info is None:
                 # Equipment is idle during changeover
                 log_entry = {
                     "Timestamp": current_time,
@@ -436,11 +457,9 @@ def generate_mes_data(start_date, end_date, config):
                     "Quality_Score": 0.0,
                     "OEE_Score": 0.0
                 }
-                all_logs.append(log_entry)
+                append_log(log_entry)
                 continue
             
-            order_info = active_order.iloc[0]
-            
             # Check ongoing downtime
             if equip_id in downtime_tracker and downtime_tracker[equip_id]["end"] > current_time:
                 status = "Stopped"
@@ -453,7 +472,7 @@ def generate_mes_data(start_date, end_date, config):
                 # Apply anomalies and get status
                 status, reason, good_units, scrap_units, downtime_end = apply_anomalies(
                     equip_id, current_time, order_info, config, changeover_start_times,
-                    performance_drop_tracker, last_cleaning_times
+                    performance_drop_tracker, last_cleaning_times, sorted_changeover_times
                 )
                 
                 if downtime_end:
@@ -518,7 +537,7 @@ def generate_mes_data(start_date, end_date, config):
                 "Quality_Score": kpis['Quality_Score'],
                 "OEE_Score": kpis['OEE_Score']
             }
-            all_logs.append(log_entry)
+            append_log(log_entry)
         
         current_time += timedelta(minutes=5)
     
@@ -550,25 +569,34 @@ def main():
     
     # Print summary statistics
     print("\nSummary Statistics:")
+    distinct = mes_data[['LineID', 'EquipmentID', 'ProductID', 'ProductionOrderID']].nunique()
     print(f"  Total records: {len(mes_data):,}")
-    print(f"  Lines: {mes_data['LineID'].nunique()}")
-    print(f"  Equipment: {mes_data['EquipmentID'].nunique()}")
-    print(f"  Products: {mes_data['ProductID'].nunique()}")
-    print(f"  Production Orders: {mes_data['ProductionOrderID'].nunique()}")
+    print(f"  Lines: {distinct['LineID']}")
+    print(f"  Equipment: {distinct['EquipmentID']}")
+    print(f"  Products: {distinct['ProductID']}")
+    print(f"  Production Orders: {distinct['ProductionOrderID']}")
     
     # KPI Summary
     print("\nKPI Summary (Overall Averages):")
-    print(f"  Availability: {mes_data['Availability_Score'].mean():.1f}%")
-    print(f"  Performance: {mes_data['Performance_Score'].mean():.1f}%")
-    print(f"  Quality: {mes_data['Quality_Score'].mean():.1f}%")
-    print(f"  OEE: {mes_data['OEE_Score'].mean():.1f}%")
+    kpi_means = mes_data[['Availability_Score', 'Performance_Score', 'Quality_Score', 'OEE_Score']].mean()
+    print(f"  Availability: {kpi_means['Availability_Score']:.1f}%")
+    print(f"  Performance: {kpi_means['Performance_Score']:.1f}%")
+    print(f"  Quality: {kpi_means['Quality_Score']:.1f}%")
+    print(f"  OEE: {kpi_means['OEE_Score']:.1f}%")
     
     # OEE Distribution
     print("\nOEE Distribution:")
-    print(f"  OEE >= 85% (World Class): {len(mes_data[mes_data['OEE_Score'] >= 85])/len(mes_data)*100:.1f}%")
-    print(f"  OEE 65-85% (Good): {len(mes_data[(mes_data['OEE_Score'] >= 65) & (mes_data['OEE_Score'] < 85)])/len(mes_data)*100:.1f}%")
-    print(f"  OEE 50-65% (Fair): {len(mes_data[(mes_data['OEE_Score'] >= 50) & (mes_data['OEE_Score'] < 65)])/len(mes_data)*100:.1f}%")
-    print(f"  OEE < 50% (Poor): {len(mes_data[mes_data['OEE_Score'] < 50])/len(mes_data)*100:.1f}%")
+    # Bucket every score in one NumPy pass: 0 = <50, 1 = 50-65, 2 = 65-85, 3 = >=85.
+    # digitize would put NaN in the top band, so missing scores are left out
+    # of every band (they still count towards the total)
+    oee_scores = mes_data['OEE_Score'].to_numpy(dtype=float)
+    oee_scores = oee_scores[~np.isnan(oee_scores)]
+    oee_bands = np.bincount(np.digitize(oee_scores, [50, 65, 85]), minlength=4)
+    oee_pct = oee_bands / len(mes_data) * 100
+    print(f"  OEE >= 85% (World Class): {oee_pct[3]:.1f}%")
+    print(f"  OEE 65-85% (Good): {oee_pct[2]:.1f}%")
+    print(f"  OEE 50-65% (Fair): {oee_pct[1]:.1f}%")
+    print(f"  OEE < 50% (Poor): {oee_pct[0]:.1f}%")
     
     # Downtime summary
     downtime_records = mes_data[mes_data['MachineStatus'] != 'Running']
@@ -584,21 +612,19 @@ def main():
     
     # Shift performance analysis
     print("\nShift Performance Analysis:")
-    for shift in [1, 2, 3]:
-        shift_data = []
-        for _, row in mes_data.iterrows():
-            if pd.notna(row['Timestamp']):
-                hour = pd.to_datetime(row['Timestamp']).hour
-                if shift == 1 and 6 <= hour < 14:
-                    shift_data.append(row)
-                elif shift == 2 and 14 <= hour < 22:
-                    shift_data.append(row)
-                elif shift == 3 and (hour >= 22 or hour < 6):
-                    shift_data.append(row)
-        
-        if shift_data:
-            shift_df = pd.DataFrame(shift_data)
-            print(f"  Shift {shift}: OEE {shift_df['OEE_Score'].mean():.1f}%")
+    # Parse timestamps once; missing timestamps become NaN hours and match no shift
+    hours = pd.to_datetime(mes_data['Timestamp'], errors='coerce').dt.hour
+    shift_masks = {
+        1: (hours >= 6) & (hours < 14),
+        2: (hours >= 14) & (hours < 22),
+        3: (hours >= 22) | (hours < 6),
+    }
+    oee = mes_data['OEE_Score']
+    for shift, mask in shift_masks.items():
+        # Filter only the OEE column rather than copying the whole frame per shift
+        shift_oee = oee[mask]
+        if len(shift_oee) > 0:
+            print(f"  Shift {shift}: OEE {shift_oee.mean():.1f}%")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
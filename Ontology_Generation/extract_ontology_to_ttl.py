@@ -21,10 +21,9 @@ def get_business_context(entity_name, ontology_parser):
     
     # For classes, check the class hierarchy for business_context
     if not base_context:
-        for class_name, class_info in ontology_parser.get_class_hierarchy():
-            if class_name == entity_name:
-                base_context = class_info.get('business_context', class_info.get('description', ''))
-                break
+        class_info = ontology_parser.get_class_info(entity_name)
+        if class_info is not None:
+            base_context = class_info.get('business_context', class_info.get('description', ''))
     
     # For properties, check property definitions
     if not base_context:
@@ -17,6 +17,12 @@ from ontology_config_parser import (
     create_data_property_from_config
 )
 
+# CSV columns with only a few distinct values, read as categoricals
+LOW_CARDINALITY_DTYPES = {
+    "MachineStatus": "category",
+    "DowntimeReason": "category",
+}
+
 
 def load_config(config_file="mes_data_config.json"):
     """Load configuration from JSON file."""
@@ -84,7 +90,9 @@ def create_ontology_structure(onto, ontology_parser):
 
 def get_or_create_individual(onto, cls, iri_suffix, **kwargs):
     """Get existing individual or create new one."""
-    individual = onto.search_one(iri=f"*{iri_suffix}")
+    # Exact IRI lookup - a wildcard search scans every IRI in the world
+    # and slows down as the ontology fills up
+    individual = onto.world[onto.base_iri + iri_suffix]
     if not individual:
         individual = cls(iri_suffix, namespace=onto, **kwargs)
     return individual
@@ -94,7 +102,9 @@ def populate_from_csv(onto, csv_file, config, ontology_parser):
     """Populate the ontology from CSV data."""
     
     print(f"Loading data from {csv_file}...")
-    df = pd.read_csv(csv_file)
+    # Status and downtime code take only a handful of values; categoricals
+    # share one string per value instead of allocating one per row
+    df = pd.read_csv(csv_file, dtype=LOW_CARDINALITY_DTYPES)
     print(f"  Found {len(df)} records")
     
     # Get equipment type mapping from configuration
@@ -209,48 +219,67 @@ def populate_from_csv(onto, csv_file, config, ontology_parser):
     print("Processing events...")
     events_created = 0
     
+    # Orders already linked to each equipment, so duplicate checks are set
+    # lookups rather than scans of equipment.executesOrder per event
+    executed_orders = {
+        eq_id: set(equipment.executesOrder) for eq_id, equipment in equipment_map.items()
+    }
+    
+    # Format timestamps and event IRIs for every row at once rather than
+    # string-munging each timestamp inside the event loop
+    timestamps = df["Timestamp"].astype(str)
+    event_iris = (
+        "EVENT-" + df["EquipmentID"].astype(str) + "-"
+        + timestamps.str.replace(" ", "T", regex=False).str.replace(":", "-", regex=False)
+    )
+    
     # Process in chunks for memory efficiency
     chunk_size = 10000
     for chunk_start in range(0, len(df), chunk_size):
         chunk_end = min(chunk_start + chunk_size, len(df))
         chunk_df = df.iloc[chunk_start:chunk_end]
         
-        for idx, row in chunk_df.iterrows():
+        # itertuples yields lightweight namedtuples instead of building a
+        # pandas Series for every row
+        for row, timestamp_str, event_iri in zip(
+            chunk_df.itertuples(index=False),
+            timestamps.iloc[chunk_start:chunk_end],
+            event_iris.iloc[chunk_start:chunk_end]
+        ):
             # Create event based on machine status
-            timestamp_str = str(row["Timestamp"])
-            event_iri = f"EVENT-{row['EquipmentID']}-{timestamp_str.replace(' ', 'T').replace(':', '-')}"
-            
-            if row["MachineStatus"] == "Running":
+            if row.MachineStatus == "Running":
                 event = get_or_create_individual(onto, onto.ProductionLog, event_iri)
-                event.hasGoodUnits = [int(row["GoodUnitsProduced"])]
-                event.hasScrapUnits = [int(row["ScrapUnitsProduced"])]
+                event.hasGoodUnits = [int(row.GoodUnitsProduced)]
+                event.hasScrapUnits = [int(row.ScrapUnitsProduced)]
             else:
                 event = get_or_create_individual(onto, onto.DowntimeLog, event_iri)
-                if pd.notna(row["DowntimeReason"]):
-                    reason = downtime_reasons.get(row["DowntimeReason"])
+                if pd.notna(row.DowntimeReason):
+                    reason = downtime_reasons.get(row.DowntimeReason)
                     if reason:
                         event.hasDowntimeReason = [reason]
-                    event.hasDowntimeReasonCode = [row["DowntimeReason"]]
+                    event.hasDowntimeReasonCode = [row.DowntimeReason]
             
             # Common event properties
             event.hasTimestamp = [timestamp_str]
-            event.hasMachineStatus = [row["MachineStatus"]]
+            event.hasMachineStatus = [row.MachineStatus]
             
             # KPI scores
-            event.hasAvailabilityScore = [float(row["Availability_Score"])]
-            event.hasPerformanceScore = [float(row["Performance_Score"])]
-            event.hasQualityScore = [float(row["Quality_Score"])]
-            event.hasOEEScore = [float(row["OEE_Score"])]
+            event.hasAvailabilityScore = [float(row.Availability_Score)]
+            event.hasPerformanceScore = [float(row.Performance_Score)]
+            event.hasQualityScore = [float(row.Quality_Score)]
+            event.hasOEEScore = [float(row.OEE_Score)]
             
             # Link event to equipment
-            equipment = equipment_map[row["EquipmentID"]]
+            equipment = equipment_map[row.EquipmentID]
             equipment.logsEvent.append(event)
             
             # Link equipment to order (only if order exists - not during changeover)
-            if pd.notna(row["ProductionOrderID"]):
-                order = orders.get(row["ProductionOrderID"])
-                if order and order not in equipment.executesOrder:
+            if pd.notna(row.ProductionOrderID):
+                order = orders.get(row.ProductionOrderID)
+                linked_orders = executed_orders[row.EquipmentID]
+                if order and order not in linked_orders:
                     equipment.executesOrder.append(order)
+                    linked_orders.add(order)
             
             events_created += 1
         
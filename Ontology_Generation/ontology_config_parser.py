@@ -20,6 +20,9 @@ class OntologyConfigParser:
         
         self.config_path = Path(config_path)
         self.config = None
+        self._class_hierarchy = None  # Full hierarchy, built on first use
+        self._class_index = None  # class_name -> class_info
+        self._attribute_indices = {}  # attribute_name -> {attribute_value: class_name}
         self._load_config()
         
     def _load_config(self):
@@ -62,6 +65,11 @@ class OntologyConfigParser:
         
         Returns list of (class_name, class_info) tuples in order suitable for creation
         """
+        # The config is not modified after loading, so the full hierarchy is
+        # built once and shared by every lookup
+        if parent_name is None and self._class_hierarchy is not None:
+            return list(self._class_hierarchy)
+        
         classes = self.get_classes()
         result = []
         
@@ -84,9 +92,17 @@ class OntologyConfigParser:
         else:
             for class_name, class_info in classes.items():
                 process_class(class_name, class_info)
+            self._class_hierarchy = result
+            result = list(result)
         
         return result
     
+    def get_class_info(self, class_name: str) -> Optional[Dict]:
+        """Get class info (including 'parent') for a class anywhere in the hierarchy"""
+        if self._class_index is None:
+            self._class_index = dict(self.get_class_hierarchy())
+        return self._class_index.get(class_name)
+    
     def get_object_properties(self) -> Dict[str, Dict]:
         """Get all object property definitions"""
         return self.config.get('object_properties', {})
@@ -132,14 +148,35 @@ class OntologyConfigParser:
         Returns:
             Class name if found, None otherwise
         """
-        classes = self.get_class_hierarchy()
-        
-        for class_name, class_info in classes:
+        # Reverse index per attribute, built once; keeps the first class in
+        # hierarchy order for each value, as a linear scan would. Classes
+        # without the attribute are indexed under None, matching .get()
+        index = self._attribute_indices.get(attribute_name)
+        if index is None:
+            index = {}
+            for class_name, class_info in self.get_class_hierarchy():
+                try:
+                    index.setdefault(class_info.get(attribute_name), class_name)
+                except TypeError:
+                    pass  # unhashable YAML value (list/dict) - only the scan below can match it
+            self._attribute_indices[attribute_name] = index
+        
+        try:
+            return index.get(attribute_value)
+        except TypeError:
+            pass
+        
+        # Unhashable values can't be looked up, so compare them directly
+        for class_name, class_info in self.get_class_hierarchy():
             if class_info.get(attribute_name) == attribute_value:
                 return class_name
         
         return None
     
+    def get_class_by_code(self, code: str) -> Optional[str]:
+        """Find class name by its code (e.g. a downtime reason code)"""
+        return self.get_class_by_attribute('code', code)
+    
     def get_property_column_mapping(self) -> Dict[str, str]:
         """Get mapping of property names to CSV columns"""
         mapping = {}
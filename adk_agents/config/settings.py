@@ -37,6 +37,7 @@ SPARQL_MAX_RESULTS = int(os.getenv("SPARQL_MAX_RESULTS", "1000"))
 # Analysis Configuration
 OEE_BENCHMARK = float(os.getenv("OEE_BENCHMARK", "85.0"))
 ONTOLOGY_NAMESPACE = os.getenv("ONTOLOGY_NAMESPACE", "http://www.semanticweb.org/michael/ontologies/2024/mes-ontology#")
+CHART_DPI = int(os.getenv("CHART_DPI", "100"))  # default resolution for saved analysis charts
 
 # Resource Paths
 ONTOLOGY_FILE = os.getenv("ONTOLOGY_FILE", "Ontology/mes_ontology_populated.owl")
@@ -55,6 +56,9 @@ LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s - %(name)s - %(levelname)s - %
 CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
 CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))  # seconds
 CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "1000"))  # entries
+CACHE_TTL_FRESH = int(os.getenv("CACHE_TTL_FRESH", "300"))  # seconds before a cached query is refreshed
+CACHE_TTL_MAX = int(os.getenv("CACHE_TTL_MAX", str(CACHE_TTL)))  # seconds before a cached query is discarded
+CACHE_FLUSH_INTERVAL = float(os.getenv("CACHE_FLUSH_INTERVAL", "5"))  # min seconds between cache file writes
 
 # Vertex AI specific settings
 if USE_VERTEX_AI:
@@ -1,5 +1,6 @@
 """Context loader for Manufacturing Analyst Agent."""
 import json
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 import logging
@@ -8,6 +9,30 @@ from ..config.settings import PROJECT_ROOT
 
 logger = logging.getLogger(__name__)
 
+# Section headers used when formatting context files
+SECTION_HEADERS = {
+    'mindmap': "### Ontology Structure:",
+    'sparql_ref': "### SPARQL Reference:",
+    'data_catalogue': "### Data Catalogue:",
+    'sparql_rules': "### SPARQL Rules:",
+    'query_patterns': "### Query Patterns:",
+    'discovery_methodology': "### Discovery Methodology:",
+    'python_analysis': "### Python Analysis Guide:",
+    'collaborative_patterns': "### Collaborative Patterns:",
+    'best_practices': "### Analysis Best Practices:",
+    'technical_notes': "### Technical Notes:"
+}
+
+@lru_cache(maxsize=32)
+def _read_file_cached(path_str: str, mtime_ns: int) -> str:
+    """Read a file's text; the mtime is part of the key so edits are picked up."""
+    with open(path_str, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _read_file(file_path: Path) -> str:
+    """Read a context file, reusing the cached text until the file changes."""
+    return _read_file_cached(str(file_path), file_path.stat().st_mtime_ns)
+
 class ContextLoader:
     """Loads and formats context for the Manufacturing Analyst Agent."""
     
@@ -44,24 +69,11 @@ class ContextLoader:
         
         try:
             if file_path.exists():
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
+                content = _read_file(file_path)
                 
                 if format_as_section:
                     # Format with section header based on file type
-                    section_headers = {
-                        'mindmap': "### Ontology Structure:",
-                        'sparql_ref': "### SPARQL Reference:",
-                        'data_catalogue': "### Data Catalogue:",
-                        'sparql_rules': "### SPARQL Rules:",
-                        'query_patterns': "### Query Patterns:",
-                        'discovery_methodology': "### Discovery Methodology:",
-                        'python_analysis': "### Python Analysis Guide:",
-                        'collaborative_patterns': "### Collaborative Patterns:",
-                        'best_practices': "### Analysis Best Practices:",
-                        'technical_notes': "### Technical Notes:"
-                    }
-                    header = section_headers.get(file_key, f"### {file_key.replace('_', ' ').title()}:")
+                    header = SECTION_HEADERS.get(file_key) or f"### {file_key.replace('_', ' ').title()}:"
                     return f"{header}\n{content}\n"
                 else:
                     return content
@@ -89,15 +101,15 @@ class ContextLoader:
             # If it's JSON, parse and format it
             if patterns_content and not patterns_content.startswith("###"):
                 patterns_data = json.loads(patterns_content)
-                query_text = "### Successful Query Examples:\n"
+                parts = ["### Successful Query Examples:\n"]
                 
                 if "patterns" in patterns_data:
                     for i, pattern in enumerate(patterns_data["patterns"][:8], 1):  # First 8 examples
-                        query_text += f"\n{i}. {pattern['purpose']}:\n```sparql\n{pattern['query']}\n```\n"
+                        parts.append(f"\n{i}. {pattern['purpose']}:\n```sparql\n{pattern['query']}\n```\n")
                         if pattern.get('notes'):
-                            query_text += f"*Note: {pattern['notes']}*\n"
+                            parts.append(f"*Note: {pattern['notes']}*\n")
                 
-                return query_text
+                return "".join(parts)
         except Exception as e:
             logger.warning(f"Failed to parse query patterns: {e}")
         
@@ -109,53 +121,56 @@ class ContextLoader:
         try:
             catalogue_path = self.context_dir / self.files['data_catalogue']
             if catalogue_path.exists():
-                with open(catalogue_path, 'r') as f:
-                    catalogue = json.load(f)
+                catalogue = json.loads(_read_file(catalogue_path))
                 
-                info = "### Data Catalogue:\n"
+                # Collect the pieces and join once instead of re-copying the
+                # growing string on every +=
+                parts = ["### Data Catalogue:\n"]
                 
                 # Metadata summary
                 if "metadata" in catalogue:
                     meta = catalogue["metadata"]
-                    info += f"- Data range: {meta['data_range']['start']} to {meta['data_range']['end']} ({meta['data_range']['days_covered']} days)\n"
-                    info += f"- Total records: {meta['total_records']:,}\n"
-                    info += f"- Update frequency: {meta['update_frequency']}\n\n"
+                    parts.extend((
+                        f"- Data range: {meta['data_range']['start']} to {meta['data_range']['end']} ({meta['data_range']['days_covered']} days)\n",
+                        f"- Total records: {meta['total_records']:,}\n",
+                        f"- Update frequency: {meta['update_frequency']}\n\n",
+                    ))
                 
                 # Equipment summary
                 if "equipment" in catalogue:
                     equipment = catalogue["equipment"]
-                    info += f"- Equipment: {equipment['count']} units\n"
+                    parts.append(f"- Equipment: {equipment['count']} units\n")
                     # Group by type
                     for eq_type, items in equipment.get("by_type", {}).items():
                         ids = [item["id"] for item in items]
-                        info += f"  - {eq_type}: {', '.join(ids)}\n"
-                    info += "\n"
+                        parts.append(f"  - {eq_type}: {', '.join(ids)}\n")
+                    parts.append("\n")
                 
                 # Products summary
                 if "products" in catalogue:
                     products = catalogue["products"]
-                    info += f"- Products: {products['count']} SKUs\n"
+                    parts.append(f"- Products: {products['count']} SKUs\n")
                     for prod in products.get("catalog", [])[:5]:  # First 5 products
-                        info += f"  - {prod['id']}: {prod['name']} (margin: {prod['margin_percent']}%)\n"
-                    info += "\n"
+                        parts.append(f"  - {prod['id']}: {prod['name']} (margin: {prod['margin_percent']}%)\n")
+                    parts.append("\n")
                 
                 # Metrics summary
                 if "metrics" in catalogue:
-                    info += "- Key Metrics:\n"
+                    parts.append("- Key Metrics:\n")
                     for metric, values in catalogue["metrics"].items():
-                        info += f"  - {metric}: mean={values['mean']}, typical={values['typical_range']}, benchmark={values['world_class']}\n"
-                    info += "\n"
+                        parts.append(f"  - {metric}: mean={values['mean']}, typical={values['typical_range']}, benchmark={values['world_class']}\n")
+                    parts.append("\n")
                 
                 # Downtime summary
                 if "downtime_reasons" in catalogue:
                     downtime = catalogue["downtime_reasons"]
-                    info += f"- Total downtime: {downtime['total_downtime_hours']} hours\n"
+                    parts.append(f"- Total downtime: {downtime['total_downtime_hours']} hours\n")
                     if downtime.get("unplanned"):
-                        info += "  - Top unplanned reasons:\n"
+                        parts.append("  - Top unplanned reasons:\n")
                         for reason in downtime["unplanned"][:3]:
-                            info += f"    - {reason['code']}: {reason['total_hours']} hours\n"
+                            parts.append(f"    - {reason['code']}: {reason['total_hours']} hours\n")
                 
-                return info
+                return "".join(parts)
             else:
                 return "### Data Catalogue: Not found\n"
         except Exception as e:
@@ -1,10 +1,11 @@
 """Tools for ADK Manufacturing Analytics."""
-from .sparql_tool import execute_sparql
+from .sparql_tool import execute_sparql, execute_sparql_batch
 from .cache_manager import cache_manager
 from .python_executor import execute_python_code
 
 __all__ = [
     "execute_sparql",
+    "execute_sparql_batch",
     "cache_manager",
     "execute_python_code"
 ]
\ No newline at end of file
@@ -1,23 +1,47 @@
 """Cache management for query patterns and results."""
-import json
 import os
+import re
+import heapq
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
-from collections import defaultdict
+from collections import defaultdict, deque
+from dataclasses import dataclass, asdict
 
 from ..config.settings import CACHE_DIR, CACHE_TTL, CACHE_MAX_SIZE
+from .json_utils import json_loads, json_dumps
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class QueryPattern:
+    """A successful query remembered for pattern learning."""
+    __slots__ = ("query", "timestamp", "result_count")  # Python 3.9 has no dataclass(slots=True)
+    
+    query: str
+    timestamp: str
+    result_count: int
+
 class CacheManager:
     """Manages query caching and pattern learning."""
     
+    PATTERN_TYPES = ["capacity", "temporal", "quality", "financial", "aggregation"]
+    MAX_PATTERNS_PER_TYPE = 50
+    
+    # Checked in order - the first matching category wins
+    QUERY_TYPE_PATTERNS = [
+        ("capacity", re.compile("OEE|AVAILABILITY|PERFORMANCE", re.IGNORECASE)),
+        ("temporal", re.compile("DATE|TIME|PERIOD|TREND", re.IGNORECASE)),
+        ("quality", re.compile("QUALITY|DEFECT|REJECTION", re.IGNORECASE)),
+        ("financial", re.compile("COST|REVENUE|ROI|FINANCIAL", re.IGNORECASE)),
+        ("aggregation", re.compile("AVG|SUM|COUNT|MIN|MAX", re.IGNORECASE)),
+    ]
+    
     def __init__(self):
         self.stats_file = CACHE_DIR / "cache_stats.json"
         self.patterns_file = CACHE_DIR / "query_patterns.json"
-        self.query_cache_file = CACHE_DIR / "query_cache.json"
+        self.query_cache_file = CACHE_DIR / "query_cache.jsonl"
         self.successful_patterns_file = CACHE_DIR / "successful_patterns.json"
         self.size_warning_threshold_mb = 100  # Warn at 100MB
         self.size_critical_threshold_mb = 500  # Critical at 500MB
@@ -26,56 +50,59 @@ class CacheManager:
     def load_stats(self):
         """Load cache statistics and patterns."""
         self.stats = defaultdict(int)
-        self.patterns = {
-            "capacity": [],
-            "temporal": [],
-            "quality": [],
-            "financial": [],
-            "aggregation": []
-        }
+        self.patterns = self._empty_patterns()
         
         if self.stats_file.exists():
             try:
-                with open(self.stats_file, 'r') as f:
-                    self.stats.update(json.load(f))
+                with open(self.stats_file, 'rb') as f:
+                    self.stats.update(json_loads(f.read()))
             except Exception as e:
                 logger.warning(f"Failed to load stats: {e}")
         
         if self.patterns_file.exists():
             try:
-                with open(self.patterns_file, 'r') as f:
-                    self.patterns.update(json.load(f))
+                with open(self.patterns_file, 'rb') as f:
+                    for query_type, patterns in json_loads(f.read()).items():
+                        self.patterns[query_type] = deque(
+                            (QueryPattern(**pattern) for pattern in patterns),
+                            maxlen=self.MAX_PATTERNS_PER_TYPE
+                        )
             except Exception as e:
                 logger.warning(f"Failed to load patterns: {e}")
     
+    def _empty_patterns(self) -> Dict[str, deque]:
+        """Create empty per-type pattern buffers holding the most recent patterns."""
+        return {
+            query_type: deque(maxlen=self.MAX_PATTERNS_PER_TYPE)
+            for query_type in self.PATTERN_TYPES
+        }
+    
+    def _patterns_for_json(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Convert pattern buffers to plain lists for serialization."""
+        return {
+            query_type: [asdict(pattern) for pattern in patterns]
+            for query_type, patterns in self.patterns.items()
+        }
+    
     def save_stats(self):
         """Save cache statistics and patterns."""
         try:
-            with open(self.stats_file, 'w') as f:
-                json.dump(dict(self.stats), f, indent=2)
+            # Compact JSON - these files are rewritten after every query
+            with open(self.stats_file, 'wb') as f:
+                f.write(json_dumps(dict(self.stats)))
             
-            with open(self.patterns_file, 'w') as f:
-                json.dump(self.patterns, f, indent=2)
+            with open(self.patterns_file, 'wb') as f:
+                f.write(json_dumps(self._patterns_for_json()))
         except Exception as e:
             logger.error(f"Failed to save stats: {e}")
     
     def classify_query(self, query: str) -> str:
         """Classify query type based on content."""
-        query_upper = query.upper()
-        
-        # Check for specific patterns
-        if any(term in query_upper for term in ["OEE", "AVAILABILITY", "PERFORMANCE"]):
-            return "capacity"
-        elif any(term in query_upper for term in ["DATE", "TIME", "PERIOD", "TREND"]):
-            return "temporal"
-        elif any(term in query_upper for term in ["QUALITY", "DEFECT", "REJECTION"]):
-            return "quality"
-        elif any(term in query_upper for term in ["COST", "REVENUE", "ROI", "FINANCIAL"]):
-            return "financial"
-        elif any(term in query_upper for term in ["AVG", "SUM", "COUNT", "MIN", "MAX"]):
-            return "aggregation"
-        else:
-            return "general"
+        # Case-insensitive search avoids an uppercase copy of the whole query
+        for query_type, pattern in self.QUERY_TYPE_PATTERNS:
+            if pattern.search(query):
+                return query_type
+        return "general"
     
     def record_query(self, query: str, success: bool, result_count: int = 0):
         """Record query execution statistics."""
@@ -91,19 +118,19 @@ class CacheManager:
             
             # Save successful pattern
             if query_type in self.patterns:
-                pattern = {
-                    "query": query,
-                    "timestamp": datetime.now().isoformat(),
-                    "result_count": result_count
-                }
-                self.patterns[query_type].append(pattern)
+                pattern = QueryPattern(
+                    query=query,
+                    timestamp=datetime.now().isoformat(),
+                    result_count=result_count
+                )
+                # The deque evicts the oldest pattern once MAX_PATTERNS_PER_TYPE is reached
+                patterns = self.patterns[query_type]
+                patterns.append(pattern)
                 
-                # Keep only recent patterns
+                # Keep only recent patterns - oldest are on the left
                 cutoff_time = datetime.now() - timedelta(days=7)
-                self.patterns[query_type] = [
-                    p for p in self.patterns[query_type]
-                    if datetime.fromisoformat(p["timestamp"]) > cutoff_time
-                ][:50]  # Keep max 50 patterns per type
+                while patterns and datetime.fromisoformat(patterns[0].timestamp) <= cutoff_time:
+                    patterns.popleft()
         else:
             self.stats["failed_queries"] += 1
         
@@ -125,10 +152,9 @@ class CacheManager:
         query_type = self.classify_query(query)
         patterns = self.patterns.get(query_type, [])
         
-        # Sort by recency
-        patterns.sort(key=lambda x: x["timestamp"], reverse=True)
-        
-        return patterns[:limit]
+        # Most recent first, without sorting every stored pattern
+        recent = heapq.nlargest(limit, patterns, key=lambda x: x.timestamp)
+        return [asdict(pattern) for pattern in recent]
     
     def cleanup_old_cache(self, cache_files: List[Path]):
         """Clean up old cache files based on TTL."""
@@ -161,16 +187,17 @@ class CacheManager:
                     "total": self.stats.get(f"{query_type}_queries", 0),
                     "success_rate": self.get_success_rate(query_type)
                 }
-                for query_type in ["capacity", "temporal", "quality", "financial", "aggregation"]
+                for query_type in self.PATTERN_TYPES
             }
         }
     
     def get_file_size_mb(self, file_path: Path) -> float:
         """Get file size in megabytes."""
-        if file_path.exists():
-            size_bytes = os.path.getsize(file_path)
-            return size_bytes / (1024 * 1024)
-        return 0.0
+        try:
+            # One stat call rather than an exists() check followed by getsize()
+            return os.stat(file_path).st_size / (1024 * 1024)
+        except OSError:
+            return 0.0
     
     def check_cache_size(self) -> Dict[str, float]:
         """Check sizes of all cache files and emit warnings if needed."""
@@ -186,7 +213,7 @@ class CacheManager:
         # Check query cache specifically since it tends to be the largest
         if sizes["query_cache"] > self.size_warning_threshold_mb:
             logger.warning(
-                f"Cache file 'query_cache.json' size ({sizes['query_cache']:.1f}MB) "
+                f"Query cache size ({sizes['query_cache']:.1f}MB) "
                 f"exceeds recommended limit ({self.size_warning_threshold_mb}MB)"
             )
         
@@ -212,15 +239,8 @@ class CacheManager:
                     self.successful_patterns_file.unlink()
                     logger.info(f"Cleared successful patterns file: {self.successful_patterns_file}")
                 
-                # Reset in-memory patterns
-                self.patterns = {
-                    "capacity": [],
-                    "temporal": [],
-                    "quality": [],
-                    "financial": [],
-                    "aggregation": []
-                }
-                self.save_stats_with_size_check()
+                # Reset in-memory patterns (saved together with the stats below)
+                self.patterns = self._empty_patterns()
             
             # Reset stats
             self.stats = defaultdict(int)
@@ -241,15 +261,7 @@ class CacheManager:
         if sum(sizes.values()) > self.size_critical_threshold_mb:
             logger.warning("Cache size exceeds critical threshold. Consider using clear_cache().")
         
-        # Call original save_stats logic
-        try:
-            with open(self.stats_file, 'w') as f:
-                json.dump(dict(self.stats), f, indent=2)
-            
-            with open(self.patterns_file, 'w') as f:
-                json.dump(self.patterns, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to save stats: {e}")
+        self.save_stats()
 
 # Create singleton instance
 cache_manager = CacheManager()
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""Fast JSON encoding for cache files and SPARQL responses.
+
+Uses orjson when it is installed and falls back to the standard library.
+Both functions work on bytes so callers can read and write files in
+binary mode without an extra decode/encode step.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or str."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize an object to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
@@ -1,15 +1,72 @@
 """Python code execution tool for advanced data analysis."""
-from typing import Dict, Any, Optional
+from typing import Dict, List, Any, Optional
 from google.adk.tools.tool_context import ToolContext
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import io
 import sys
 import logging
+from collections import OrderedDict
+
+from ..config.settings import CHART_DPI
 
 logger = logging.getLogger(__name__)
 
+# pandas, numpy and matplotlib are slow to import, so they are loaded on the
+# first analysis run instead of at agent start-up
+pd = None
+np = None
+plt = None
+
+def _lazy_init():
+    """Import the analysis libraries on first use."""
+    global pd, np, plt
+    if pd is not None:
+        return
+    import numpy
+    import pandas
+    try:
+        import matplotlib
+        matplotlib.use("Agg")  # headless: no GUI backend setup or event polling per chart
+        import matplotlib.pyplot as pyplot
+        # Saved charts default to a modest resolution; the PNG encode dominates
+        # save time at higher DPI. Code can still pass dpi= explicitly.
+        pyplot.rcParams["savefig.dpi"] = CHART_DPI
+        plt = pyplot
+    except ImportError:  # pragma: no cover - matplotlib is listed in requirements.txt
+        plt = None
+    np = numpy
+    pd = pandas  # set last - it marks initialization as done
+
+# DataFrames built from cached results, most recently used last
+FRAME_CACHE_SIZE = 8
+_frame_cache: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+
+def _build_frame(cache_id: str, columns: List[str], rows: List[List[Any]]) -> "pd.DataFrame":
+    """Build the DataFrame for a cached result, reusing it for repeat analyses.
+    
+    A cache_id always refers to the same result, so the frame only has to be
+    built once. Callers get a copy so analysis code can't alter the cached one.
+    """
+    df = _frame_cache.get(cache_id)
+    if df is None:
+        width = len(columns)
+        if rows and all(len(row) == width for row in rows):
+            # Transpose the rows once and build from column tuples; faster
+            # than pandas inferring types across a list of row lists.
+            # Integer keys keep duplicate column names apart.
+            df = pd.DataFrame(dict(enumerate(zip(*rows))))
+            df.columns = columns
+        else:
+            # zip() would truncate ragged rows; pandas pads short rows with
+            # NaN (and gives an empty result the usual object columns)
+            df = pd.DataFrame(rows, columns=columns)
+        _frame_cache[cache_id] = df
+        if len(_frame_cache) > FRAME_CACHE_SIZE:
+            _frame_cache.popitem(last=False)
+    else:
+        _frame_cache.move_to_end(cache_id)
+    return df.copy()
+
 def execute_python_code(
     code: str, 
     cache_id: Optional[str] = None,
@@ -22,6 +79,7 @@ def execute_python_code(
     - data: The raw query results as a list of lists (backward compatibility)
     - columns: List of column names from the SPARQL query
     - pandas as pd, numpy as np, datetime, timedelta
+    - matplotlib.pyplot as plt (headless Agg backend)
     - Must define 'result' dict with analysis findings
     
     Start simple and build complexity iteratively. If an error occurs, 
@@ -55,6 +113,7 @@ def execute_python_code(
         '''
     """
     logger.info(f"Executing Python code{' with cache_id: ' + cache_id if cache_id else ''}")
+    _lazy_init()
     
     # Setup execution namespace
     namespace = {
@@ -65,6 +124,8 @@ def execute_python_code(
         'timedelta': timedelta,
         'print': print,  # Allow debugging output
     }
+    if plt is not None:
+        namespace['plt'] = plt
     
     # Load cached data if provided
     if cache_id:
@@ -79,7 +140,7 @@ def execute_python_code(
                 if 'columns' in data and 'results' in data:
                     # Create DataFrame with proper column names
                     columns = [col.replace('?', '') for col in data['columns']]
-                    namespace['df'] = pd.DataFrame(data['results'], columns=columns)
+                    namespace['df'] = _build_frame(cache_id, columns, data['results'])
                     
                     # Also provide raw data for backward compatibility
                     namespace['data'] = data['results']
@@ -166,4 +227,9 @@ def execute_python_code(
             "error": error_msg,
             "error_type": type(e).__name__,
             "output": buffer.getvalue()
-        }
\ No newline at end of file
+        }
+    finally:
+        # Figures left open by the analysis code would otherwise pile up in
+        # pyplot's global figure manager across calls
+        if plt is not None:
+            plt.close('all')
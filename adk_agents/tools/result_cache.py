@@ -1,14 +1,17 @@
 """Result cache manager for handling large query results."""
 import json
-import hashlib
+import heapq
 import logging
 import os
+import threading
 from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from pathlib import Path
 import uuid
+from itertools import zip_longest
 
 from ..config.settings import CACHE_DIR
+from .json_utils import json_loads, json_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +24,9 @@ class ResultCacheManager:
         self.index_file = self.cache_dir / "index.json"
         self.size_warning_threshold_mb = 50  # Warn at 50MB per result file
         self.total_size_warning_threshold_mb = 200  # Warn at 200MB total
+        # Concurrent queries update the index; reentrant because save_index
+        # (which locks) is called from methods already holding the lock
+        self._index_lock = threading.RLock()
         self.load_index()
     
     def load_index(self):
@@ -28,8 +34,8 @@ class ResultCacheManager:
         self.index = {}
         if self.index_file.exists():
             try:
-                with open(self.index_file, 'r') as f:
-                    self.index = json.load(f)
+                with open(self.index_file, 'rb') as f:
+                    self.index = json_loads(f.read())
             except Exception as e:
                 logger.warning(f"Failed to load cache index: {e}")
     
@@ -39,8 +45,9 @@ class ResultCacheManager:
             # Check size before saving
             self.check_cache_size()
             
-            with open(self.index_file, 'w') as f:
-                json.dump(self.index, f, indent=2)
+            # Compact JSON - the index is rewritten for every cached result
+            with self._index_lock, open(self.index_file, 'wb') as f:
+                f.write(json_dumps(self.index))
         except Exception as e:
             logger.error(f"Failed to save cache index: {e}")
     
@@ -76,13 +83,14 @@ class ResultCacheManager:
         # Add statistics for numeric columns
         if results and columns:
             stats = {}
-            for i, col in enumerate(columns):
+            # Transpose once rather than indexing every row for every column;
+            # short rows are padded with None, which is skipped below
+            for col, column_values in zip(columns, zip_longest(*results)):
                 values = []
-                for row in results:
+                for value in column_values:
                     try:
-                        val = float(row[i])
-                        values.append(val)
-                    except (ValueError, TypeError, IndexError):
+                        values.append(float(value))
+                    except (ValueError, TypeError):
                         pass
                 
                 if values:
@@ -102,9 +110,15 @@ class ResultCacheManager:
         
         return summary
     
-    def cache_result(self, query: str, result: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    def cache_result(self, query: str, result: Dict[str, Any], raw: Optional[bytes] = None) -> Tuple[str, Dict[str, Any]]:
         """Cache query result and return cache ID with summary.
         
+        Args:
+            query: The query that produced the result
+            result: Parsed query result
+            raw: Optional JSON bytes the result was parsed from; written
+                as-is to skip re-serializing the result
+        
         Returns:
             Tuple of (cache_id, summary)
         """
@@ -115,8 +129,8 @@ class ResultCacheManager:
         # Save full result to file
         result_file = self.cache_dir / f"{cache_id}.json"
         try:
-            with open(result_file, 'w') as f:
-                json.dump(result, f)
+            with open(result_file, 'wb') as f:
+                f.write(raw if raw is not None else json_dumps(result))
         except Exception as e:
             logger.error(f"Failed to cache result: {e}")
             return "", result
@@ -125,15 +139,16 @@ class ResultCacheManager:
         summary = self.create_summary(result)
         
         # Update index
-        self.index[cache_id] = {
-            "query": query,
-            "timestamp": timestamp,
-            "file": str(result_file),
-            "row_count": summary.get("row_count", 0),
-            "columns": summary.get("columns", []),
-            "estimated_tokens": summary.get("estimated_tokens", 0)
-        }
-        self.save_index()
+        with self._index_lock:
+            self.index[cache_id] = {
+                "query": query,
+                "timestamp": timestamp,
+                "file": str(result_file),
+                "row_count": summary.get("row_count", 0),
+                "columns": summary.get("columns", []),
+                "estimated_tokens": summary.get("estimated_tokens", 0)
+            }
+            self.save_index()
         
         # Add cache reference to summary
         summary["cache_id"] = cache_id
@@ -143,28 +158,31 @@ class ResultCacheManager:
     
     def get_cached_result(self, cache_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve full cached result by ID."""
-        if cache_id not in self.index:
+        with self._index_lock:
+            info = self.index.get(cache_id)
+        if info is None:
             return None
         
-        result_file = Path(self.index[cache_id]["file"])
+        result_file = Path(info["file"])
         if not result_file.exists():
             return None
         
         try:
-            with open(result_file, 'r') as f:
-                return json.load(f)
+            with open(result_file, 'rb') as f:
+                return json_loads(f.read())
         except Exception as e:
             logger.error(f"Failed to load cached result: {e}")
             return None
     
     def list_cached_results(self, limit: int = 20) -> List[Dict[str, Any]]:
         """List recent cached results."""
-        # Sort by timestamp descending
-        sorted_items = sorted(
-            self.index.items(),
-            key=lambda x: x[1]["timestamp"],
-            reverse=True
-        )[:limit]
+        # Most recent first - a bounded heap instead of sorting the whole index
+        with self._index_lock:
+            sorted_items = heapq.nlargest(
+                limit,
+                self.index.items(),
+                key=lambda x: x[1]["timestamp"]
+            )
         
         return [
             {
@@ -174,12 +192,17 @@ class ResultCacheManager:
             for cache_id, info in sorted_items
         ]
     
+    def _file_size_bytes(self, file_path: Path) -> Optional[int]:
+        """Get file size with a single stat call, or None if the file is missing."""
+        try:
+            return os.stat(file_path).st_size
+        except OSError:
+            return None
+    
     def get_file_size_mb(self, file_path: Path) -> float:
         """Get file size in megabytes."""
-        if file_path.exists():
-            size_bytes = os.path.getsize(file_path)
-            return size_bytes / (1024 * 1024)
-        return 0.0
+        size_bytes = self._file_size_bytes(file_path)
+        return size_bytes / (1024 * 1024) if size_bytes is not None else 0.0
     
     def check_cache_size(self) -> Dict[str, Any]:
         """Check sizes of cache files and emit warnings if needed."""
@@ -190,31 +213,39 @@ class ResultCacheManager:
             "file_count": 0
         }
         
+        # Snapshot the index so the file stats run without holding the lock
+        with self._index_lock:
+            entries = list(self.index.items())
+        
         # Check all result files
-        for cache_id, info in self.index.items():
+        for cache_id, info in entries:
             # Handle missing 'file' key for backward compatibility
             if "file" not in info:
                 logger.warning(f"Cache entry {cache_id} missing 'file' key, skipping")
                 continue
                 
             result_file = Path(info["file"])
-            if result_file.exists():
-                size_mb = self.get_file_size_mb(result_file)
-                result["result_files"].append({
-                    "cache_id": cache_id,
-                    "file": str(result_file.name),
-                    "size_mb": size_mb,
-                    "query": info.get("query", "")[:100] + "..."  # First 100 chars
-                })
-                result["total_size_mb"] += size_mb
-                result["file_count"] += 1
-                
-                # Warn about large individual files
-                if size_mb > self.size_warning_threshold_mb:
-                    logger.warning(
-                        f"Cache result file '{result_file.name}' ({size_mb:.1f}MB) "
-                        f"exceeds recommended limit ({self.size_warning_threshold_mb}MB)"
-                    )
+            # A single stat both detects missing files and gives the size
+            size_bytes = self._file_size_bytes(result_file)
+            if size_bytes is None:
+                continue
+            
+            size_mb = size_bytes / (1024 * 1024)
+            result["result_files"].append({
+                "cache_id": cache_id,
+                "file": str(result_file.name),
+                "size_mb": size_mb,
+                "query": info.get("query", "")[:100] + "..."  # First 100 chars
+            })
+            result["total_size_mb"] += size_mb
+            result["file_count"] += 1
+            
+            # Warn about large individual files
+            if size_mb > self.size_warning_threshold_mb:
+                logger.warning(
+                    f"Cache result file '{result_file.name}' ({size_mb:.1f}MB) "
+                    f"exceeds recommended limit ({self.size_warning_threshold_mb}MB)"
+                )
         
         # Add index size to total
         result["total_size_mb"] += result["index_size_mb"]
@@ -230,80 +261,82 @@ class ResultCacheManager:
     
     def clear_cache(self, keep_recent_days: Optional[int] = None):
         """Clear all or old cache entries."""
-        if keep_recent_days is None:
-            # Clear all
-            to_remove = list(self.index.keys())
-            logger.info("Clearing entire result cache...")
-        else:
-            # Clear old entries
-            from datetime import timedelta
-            cutoff = datetime.now() - timedelta(days=keep_recent_days)
+        with self._index_lock:
+            if keep_recent_days is None:
+                # Clear all
+                to_remove = list(self.index.keys())
+                logger.info("Clearing entire result cache...")
+            else:
+                # Clear old entries
+                from datetime import timedelta
+                cutoff = datetime.now() - timedelta(days=keep_recent_days)
             
-            to_remove = []
-            for cache_id, info in self.index.items():
-                try:
-                    timestamp = datetime.fromisoformat(info["timestamp"])
-                    if timestamp < cutoff:
-                        to_remove.append(cache_id)
-                except:
-                    pass
+                to_remove = []
+                for cache_id, info in self.index.items():
+                    try:
+                        timestamp = datetime.fromisoformat(info["timestamp"])
+                        if timestamp < cutoff:
+                            to_remove.append(cache_id)
+                    except:
+                        pass
             
-            logger.info(f"Clearing cache entries older than {keep_recent_days} days...")
+                logger.info(f"Clearing cache entries older than {keep_recent_days} days...")
         
-        # Remove files and index entries
-        removed_count = 0
-        removed_size_mb = 0.0
+            # Remove files and index entries
+            removed_count = 0
+            removed_size_mb = 0.0
         
-        for cache_id in to_remove:
-            # Handle missing 'file' key
-            if "file" not in self.index[cache_id]:
-                logger.warning(f"Cache entry {cache_id} missing 'file' key, removing from index")
-                del self.index[cache_id]
-                removed_count += 1
-                continue
+            for cache_id in to_remove:
+                # Handle missing 'file' key
+                if "file" not in self.index[cache_id]:
+                    logger.warning(f"Cache entry {cache_id} missing 'file' key, removing from index")
+                    del self.index[cache_id]
+                    removed_count += 1
+                    continue
                 
-            result_file = Path(self.index[cache_id]["file"])
-            if result_file.exists():
-                removed_size_mb += self.get_file_size_mb(result_file)
-                result_file.unlink()
-                removed_count += 1
-            del self.index[cache_id]
+                result_file = Path(self.index[cache_id]["file"])
+                if result_file.exists():
+                    removed_size_mb += self.get_file_size_mb(result_file)
+                    result_file.unlink()
+                    removed_count += 1
+                del self.index[cache_id]
         
-        self.save_index()
-        logger.info(
-            f"Cleared {removed_count} cache entries "
-            f"({removed_size_mb:.1f}MB freed)"
-        )
+            self.save_index()
+            logger.info(
+                f"Cleared {removed_count} cache entries "
+                f"({removed_size_mb:.1f}MB freed)"
+            )
     
     def clear_old_cache(self, days: int = 7):
         """Clear cache entries older than specified days."""
-        from datetime import timedelta
-        cutoff = datetime.now() - timedelta(days=days)
+        with self._index_lock:
+            from datetime import timedelta
+            cutoff = datetime.now() - timedelta(days=days)
         
-        to_remove = []
-        for cache_id, info in self.index.items():
-            try:
-                timestamp = datetime.fromisoformat(info["timestamp"])
-                if timestamp < cutoff:
-                    to_remove.append(cache_id)
-            except:
-                pass
+            to_remove = []
+            for cache_id, info in self.index.items():
+                try:
+                    timestamp = datetime.fromisoformat(info["timestamp"])
+                    if timestamp < cutoff:
+                        to_remove.append(cache_id)
+                except:
+                    pass
         
-        for cache_id in to_remove:
-            result_file = Path(self.index[cache_id]["file"])
-            if result_file.exists():
-                result_file.unlink()
-            del self.index[cache_id]
+            for cache_id in to_remove:
+                result_file = Path(self.index[cache_id]["file"])
+                if result_file.exists():
+                    result_file.unlink()
+                del self.index[cache_id]
         
-        self.save_index()
-        logger.info(f"Cleared {len(to_remove)} old cache entries")
+            self.save_index()
+            logger.info(f"Cleared {len(to_remove)} old cache entries")
 
 # Create singleton instance
 result_cache = ResultCacheManager()
 
-def cache_query_result(query: str, result: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+def cache_query_result(query: str, result: Dict[str, Any], raw: Optional[bytes] = None) -> Tuple[str, Dict[str, Any]]:
     """Cache a query result and return summary with cache ID."""
-    return result_cache.cache_result(query, result)
+    return result_cache.cache_result(query, result, raw)
 
 def get_cached_result(cache_id: str) -> Optional[Dict[str, Any]]:
     """Retrieve full cached result by ID."""
@@ -1,80 +1,339 @@
 """SPARQL execution tool with caching and pattern learning."""
-import json
+import atexit
+import os
+import queue
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import logging
 from ..config.settings import (
     SPARQL_ENDPOINT, SPARQL_TIMEOUT, SPARQL_MAX_RESULTS,
-    CACHE_DIR, CACHE_ENABLED, get_sparql_config
+    CACHE_DIR, CACHE_ENABLED, CACHE_MAX_SIZE, CACHE_TTL_FRESH, CACHE_TTL_MAX,
+    CACHE_FLUSH_INTERVAL, get_sparql_config
 )
-from .result_cache import cache_query_result, estimate_result_tokens
+from .result_cache import cache_query_result, get_cached_result, estimate_result_tokens
+from .json_utils import json_loads, json_dumps
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=4096)
+def _query_hash(query: str) -> str:
+    """Hash a query for use as a cache key.
+    
+    The key is only an identifier, so a 128-bit BLAKE2b digest is
+    plenty and cheaper to compute than SHA-256. Memoized because agents
+    frequently re-issue the exact same query text.
+    """
+    return hashlib.blake2b(query.strip().encode('utf-8'), digest_size=16).hexdigest()
+
 class SPARQLExecutor:
-    """Handles SPARQL query execution with caching."""
+    """Handles SPARQL query execution with caching.
+    
+    Result payloads are owned by the result cache; the query cache only
+    maps a query hash to the result's cache_id (and the endpoint's ETag,
+    used to revalidate stale entries with a conditional request). The CACHE_MAX_SIZE most
+    recently used payloads are also kept in memory. The mapping is
+    persisted as an append-only JSONL index: each new result appends one
+    line, later lines win on reload, and the index is compacted once it
+    holds far more lines than live entries.
+    
+    Index writes happen on a background writer thread, so a query never
+    waits on them.
+    """
+    
+    COMPACT_RATIO = 2  # compact when log lines exceed this multiple of live entries
+    COMPACT_MIN_LINES = 100  # never bother compacting logs smaller than this
     
     def __init__(self):
         self.config = get_sparql_config()
-        self.cache_file = CACHE_DIR / "query_cache.json"
+        self._session = self._create_session()
+        self.cache_file = CACHE_DIR / "query_cache.jsonl"
+        self.hot_cache_size = CACHE_MAX_SIZE
+        self._cache_lock = threading.Lock()
+        self._index_lock = threading.Lock()  # guards query_index and _pending_appends
+        self._pending_appends = []
+        self._log_lines = 0
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._dirty_cache = False
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+        self._write_q = queue.Queue()
         self.load_cache()
+        self._writer = threading.Thread(target=self._writer_loop, name="sparql-cache-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled HTTP session so queries reuse keep-alive connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(["POST"]),  # SPARQL SELECTs are safe to retry
+                raise_on_status=False
+            )
+        )
+        session.mount(self.config["endpoint"], adapter)
+        session.headers.update({"Content-Type": "application/json"})
+        return session
     
     def load_cache(self):
-        """Load query cache from disk."""
-        self.query_cache = {}
+        """Load the query index from disk, dropping expired entries.
+        
+        Payloads are not read here; they are loaded lazily on first hit.
+        """
+        self.query_index = {}
+        self.query_cache = OrderedDict()
+        self._log_lines = 0
         
         if CACHE_ENABLED and self.cache_file.exists():
             try:
-                with open(self.cache_file, 'r') as f:
-                    self.query_cache = json.load(f)
+                with open(self.cache_file, 'rb') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        self._log_lines += 1
+                        record = json_loads(line)
+                        if "id" in record:
+                            query_hash = record.pop("h")
+                            self.query_index[query_hash] = record
             except Exception as e:
                 logger.warning(f"Failed to load query cache: {e}")
+            
+            now = time.time()
+            with self._index_lock:
+                expired = [h for h, entry in self.query_index.items() if now - entry["ts"] >= CACHE_TTL_MAX]
+            for query_hash in expired:
+                self._drop(query_hash)
+            
+            if self._needs_compaction():
+                self.compact()
     
     def save_cache(self):
-        """Save query cache to disk."""
-        if CACHE_ENABLED:
+        """Append newly cached entries to the on-disk index."""
+        if not CACHE_ENABLED:
+            return
+        
+        # Swap under the lock so an entry appended concurrently lands either
+        # in this batch or the next one, never in a list already written
+        with self._index_lock:
+            pending, self._pending_appends = self._pending_appends, []
+        try:
+            with open(self.cache_file, 'ab') as f:
+                # A hash updated twice since the last flush only needs its latest entry
+                for query_hash in dict.fromkeys(pending):
+                    entry = self.query_index.get(query_hash)
+                    if entry is None:
+                        continue
+                    f.write(json_dumps({"h": query_hash, **entry}) + b"\n")
+                    self._log_lines += 1
+        except Exception as e:
+            logger.error(f"Failed to save query cache: {e}")
+            return
+        
+        if self._needs_compaction():
+            self.compact()
+    
+    def _needs_compaction(self) -> bool:
+        """Check whether superseded or expired lines dominate the index."""
+        return (
+            self._log_lines > self.COMPACT_MIN_LINES
+            and self._log_lines > self.COMPACT_RATIO * len(self.query_index)
+        )
+    
+    def compact(self):
+        """Rewrite the index so it holds exactly one line per live entry."""
+        tmp_file = self.cache_file.with_suffix(".jsonl.tmp")
+        try:
+            # Snapshot so a background refresh can't mutate the dict mid-write
+            with self._index_lock:
+                entries = dict(self.query_index)
+            with open(tmp_file, 'wb') as f:
+                for query_hash, entry in entries.items():
+                    f.write(json_dumps({"h": query_hash, **entry}) + b"\n")
+            os.replace(tmp_file, self.cache_file)
+            logger.info(f"Compacted query cache index from {self._log_lines} to {len(entries)} lines")
+            self._log_lines = len(entries)
+        except Exception as e:
+            logger.error(f"Failed to compact query cache: {e}")
+    
+    def _get_cached(self, query_hash: str, cache_id: str) -> Optional[Dict[str, Any]]:
+        """Get a cached payload from memory, falling back to the result cache."""
+        with self._cache_lock:
+            payload = self.query_cache.get(query_hash)
+            if payload is not None:
+                self.query_cache.move_to_end(query_hash)
+                return payload
+        
+        payload = get_cached_result(cache_id)
+        if payload is None:
+            return None
+        
+        payload["cache_id"] = cache_id
+        self._remember(query_hash, payload)
+        return payload
+    
+    def _remember(self, query_hash: str, payload: Dict[str, Any]):
+        """Keep a payload in memory, evicting the least recently used."""
+        with self._cache_lock:
+            self.query_cache[query_hash] = payload
+            self.query_cache.move_to_end(query_hash)
+            while len(self.query_cache) > self.hot_cache_size:
+                self.query_cache.popitem(last=False)
+    
+    def _store(self, query_hash: str, query: str, result: Dict[str, Any], raw: bytes, etag: Optional[str] = None):
+        """Save a fresh result to the result cache and point the index at it.
+        
+        The response bytes are written as-is rather than re-serialized.
+        """
+        cache_id, _ = cache_query_result(query, result, raw)
+        if not cache_id:
+            return
+        
+        result["cache_id"] = cache_id
+        self._remember(query_hash, result)
+        self._index(query_hash, {"ts": time.time(), "id": cache_id, "etag": etag})
+    
+    def _index(self, query_hash: str, entry: Dict[str, Any]):
+        """Record an index entry and queue it for the writer thread."""
+        with self._index_lock:
+            self.query_index[query_hash] = entry
+            self._pending_appends.append(query_hash)
+        self._dirty_cache = True
+        self._write_q.put(query_hash)
+    
+    def _writer_loop(self):
+        """Flush the index in the background whenever new entries arrive."""
+        running = True
+        while running:
             try:
-                with open(self.cache_file, 'w') as f:
-                    json.dump(self.query_cache, f, indent=2)
-            except Exception as e:
-                logger.error(f"Failed to save query cache: {e}")
+                batch = [self._write_q.get(timeout=0.5)]
+            except queue.Empty:
+                self._maybe_flush()
+                continue
+            
+            while True:
+                try:
+                    batch.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            running = None not in batch
+            self._maybe_flush()
+        
+        self._flush_now()
+    
+    def close(self):
+        """Stop the writer thread after it has persisted everything queued."""
+        if self._writer.is_alive():
+            self._write_q.put(None)
+            self._writer.join(timeout=10)
+    
+    def _drop(self, query_hash: str):
+        """Forget a cached entry. The result cache manages the payload's lifetime."""
+        with self._index_lock:
+            self.query_index.pop(query_hash, None)
+        with self._cache_lock:
+            self.query_cache.pop(query_hash, None)
+    
+    def _maybe_flush(self):
+        """Write the cache if it is dirty and CACHE_FLUSH_INTERVAL has elapsed.
+        
+        Debouncing turns a burst of queries into a single append.
+        Anything still pending is written when the executor is closed.
+        """
+        if time.monotonic() - self._last_flush >= CACHE_FLUSH_INTERVAL:
+            self._flush_now()
+    
+    def _flush_now(self):
+        """Write the cache immediately if there are unsaved changes."""
+        with self._flush_lock:
+            if not self._dirty_cache:
+                return
+            self._dirty_cache = False
+            self._last_flush = time.monotonic()
+            self.save_cache()
     
     def get_query_hash(self, query: str) -> str:
         """Generate hash for query caching."""
-        return hashlib.sha256(query.strip().encode()).hexdigest()
+        return _query_hash(query)
     
     def execute(self, query: str) -> Dict[str, Any]:
-        """Execute SPARQL query with caching."""
+        """Execute SPARQL query with caching.
+        
+        Cached results younger than CACHE_TTL_FRESH are returned directly.
+        Older results (up to CACHE_TTL_MAX) are still returned, but a
+        background refresh is scheduled so the next caller sees fresh data.
+        """
         query_hash = self.get_query_hash(query)
         
         # Check cache
-        if CACHE_ENABLED and query_hash in self.query_cache:
-            logger.info("Returning cached result")
-            return self.query_cache[query_hash]
+        if CACHE_ENABLED:
+            entry = self.query_index.get(query_hash)
+            if entry is not None:
+                age = time.time() - entry["ts"]
+                payload = self._get_cached(query_hash, entry["id"]) if age < CACHE_TTL_MAX else None
+                if payload is None:
+                    # Expired or unreadable - treat as a miss
+                    self._drop(query_hash)
+                elif age < CACHE_TTL_FRESH:
+                    logger.info("Returning cached result")
+                    return payload
+                else:
+                    logger.info(f"Returning stale cached result ({age:.0f}s old), refreshing in background")
+                    self._schedule_refresh(query_hash, query, entry.get("etag"))
+                    return payload
         
-        # Execute query
+        return self._fetch(query_hash, query)
+    
+    def _fetch(self, query_hash: str, query: str, etag: Optional[str] = None) -> Dict[str, Any]:
+        """Run query against the endpoint and cache a successful result.
+        
+        If etag is given the request is conditional; a 304 means the cached
+        result is still current and only its timestamp is renewed.
+        """
         try:
-            response = requests.post(
+            response = self._session.post(
                 self.config["endpoint"],
                 json={
                     "query": query,
                     "use_names": True,
                     "timeout": self.config["timeout"]
                 },
-                headers={"Content-Type": "application/json"},
+                headers={"If-None-Match": etag} if etag else None,
                 timeout=self.config["timeout"]
             )
             
+            if response.status_code == 304:
+                entry = self.query_index.get(query_hash)
+                payload = self._get_cached(query_hash, entry["id"]) if entry else None
+                if payload is not None:
+                    self._index(query_hash, {**entry, "ts": time.time()})
+                    return payload
+                # Cache entry vanished while we were revalidating - fetch unconditionally
+                return self._fetch(query_hash, query)
+            
             if response.status_code == 200:
-                result = response.json()
+                raw = response.content
+                result = json_loads(raw)
                 
                 # Cache successful result
                 if CACHE_ENABLED:
-                    self.query_cache[query_hash] = result
-                    self.save_cache()
+                    self._store(query_hash, query, result, raw, response.headers.get("ETag"))
                 
                 return result
             else:
@@ -88,6 +347,26 @@ class SPARQLExecutor:
         except Exception as e:
             return {"error": str(e)}
     
+    def _schedule_refresh(self, query_hash: str, query: str, etag: Optional[str] = None):
+        """Refresh a stale cache entry in a background thread.
+        
+        At most one refresh per query runs at a time, so a burst of callers
+        hitting the same stale entry only triggers a single round trip.
+        """
+        with self._refresh_lock:
+            if query_hash in self._refreshing:
+                return
+            self._refreshing.add(query_hash)
+        
+        def _refresh():
+            try:
+                self._fetch(query_hash, query, etag)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(query_hash)
+        
+        threading.Thread(target=_refresh, name="sparql-cache-refresh", daemon=True).start()
+    
 
 # Create singleton instance
 executor = SPARQLExecutor()
@@ -124,8 +403,10 @@ def execute_sparql(query: str) -> Dict[str, Any]:
         # Estimate tokens to decide if we need to return summary
         estimated_tokens = estimate_result_tokens(result)
         
-        # Always cache the result
-        cache_id, summary = cache_query_result(query, result)
+        # Reuse the query cache's entry; only cache here if the executor didn't
+        cache_id = result.get("cache_id")
+        if not cache_id:
+            cache_id, summary = cache_query_result(query, result)
         
         # For large results, return summary + sample
         if estimated_tokens > 10000:
@@ -150,6 +431,24 @@ def execute_sparql(query: str) -> Dict[str, Any]:
     
     return result
 
+def execute_sparql_batch(queries: List[str]) -> List[Dict[str, Any]]:
+    """Execute several independent SPARQL queries concurrently.
+    
+    Queries share the executor's pooled HTTP session, so network latency
+    overlaps instead of adding up.
+    
+    Args:
+        queries: SPARQL queries to execute
+    
+    Returns:
+        Results in the same order as the queries
+    """
+    if not queries:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=min(8, len(queries)), thread_name_prefix="sparql-batch") as pool:
+        return list(pool.map(execute_sparql, queries))
+
 def get_cached_query_result(cache_id: str) -> Dict[str, Any]:
     """Retrieve full cached query result by ID.
     
@@ -159,8 +458,6 @@ def get_cached_query_result(cache_id: str) -> Dict[str, Any]:
     Returns:
         Full query result or error if not found
     """
-    from .result_cache import get_cached_result
-    
     result = get_cached_result(cache_id)
     if result:
         return result
@@ -24,6 +24,7 @@ import shutil
 import subprocess
 import argparse
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 import traceback
@@ -338,6 +339,15 @@ class DataPipelineOrchestrator:
                 shutil.copy2(path, backup_path)
                 logger.info(f"  - Backed up {name}: {path.name}")
 
+    @staticmethod
+    def _log_stream(stream, log):
+        """Log each non-blank line of a subprocess pipe until it closes"""
+        with stream:
+            for line in stream:
+                line = line.rstrip()
+                if line:
+                    log(f"  {line}")
+
     def run_script(self, script_name: str, script_path: Path) -> bool:
         """Run a Python script and capture output"""
         if not script_path.exists():
@@ -351,25 +361,26 @@ class DataPipelineOrchestrator:
             return True
         
         try:
-            # Run the script
-            result = subprocess.run(
+            # Run the script, logging its output line by line as it arrives
+            # instead of buffering the whole run in memory. stderr is drained
+            # on a helper thread so neither pipe can fill up and block the script.
+            process = subprocess.Popen(
                 [sys.executable, str(script_path)],
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True,
                 cwd=self.project_root
             )
+            stderr_thread = threading.Thread(
+                target=self._log_stream, args=(process.stderr, logger.warning), daemon=True
+            )
+            stderr_thread.start()
+            self._log_stream(process.stdout, logger.info)
+            stderr_thread.join()
+            returncode = process.wait()
             
-            # Log output
-            if result.stdout:
-                for line in result.stdout.strip().split('\n'):
-                    logger.info(f"  {line}")
-            
-            if result.stderr:
-                for line in result.stderr.strip().split('\n'):
-                    logger.warning(f"  {line}")
-            
-            if result.returncode != 0:
-                logger.error(f"Script failed with return code: {result.returncode}")
+            if returncode != 0:
+                logger.error(f"Script failed with return code: {returncode}")
                 return False
             
             logger.info(f"✓ {script_name} completed successfully")
@@ -412,8 +423,18 @@ class DataPipelineOrchestrator:
                     logger.error(f"CSV missing columns: {missing_columns}")
                     return False
                 
-                # Check row count
-                row_count = len(pd.read_csv(output_path, usecols=['Timestamp']))
+                # Check row count - the generated CSV has one record per line, so
+                # count newlines instead of parsing the whole file a second time.
+                # bytes.count scans each 1MB block in C without splitting lines.
+                line_count = 0
+                last_block = b''
+                with open(output_path, 'rb') as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b''):
+                        line_count += block.count(b'\n')
+                        last_block = block
+                if last_block and not last_block.endswith(b'\n'):
+                    line_count += 1  # final line without a trailing newline
+                row_count = line_count - 1  # minus the header
                 logger.info(f"  - CSV contains {row_count:,} rows")
                 if row_count < 30000:
                     logger.warning(f"CSV has fewer rows than expected: {row_count}")
@@ -523,6 +544,28 @@ class DataPipelineOrchestrator:
             
         return mindmap_success, catalogue_success
 
+    def start_catalogue_generation(self) -> concurrent.futures.Future:
+        """Start catalogue generation in the background and return its future
+        
+        The catalogue is built from the CSV alone, so it can run alongside
+        ontology population instead of waiting for it.
+        """
+        logger.info("Starting catalogue generation alongside ontology population...")
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(self.run_script, 'catalogue generation', self.scripts['catalogue'])
+        executor.shutdown(wait=False)
+        return future
+
+    def wait_for_background_catalogue(self, future: concurrent.futures.Future) -> bool:
+        """Wait for a background catalogue run and report how it ended"""
+        logger.info("Waiting for background catalogue generation to finish...")
+        success = future.result()
+        if success:
+            logger.info("  Background catalogue generation succeeded")
+        else:
+            logger.error("  Background catalogue generation failed")
+        return success
+
     def orchestrate(self, steps: Optional[List[str]] = None) -> bool:
         """Run the complete orchestration pipeline"""
         all_steps = ['validate', 'backup', 'data', 'ontology', 'mindmap', 'catalogue']
@@ -534,6 +577,10 @@ class DataPipelineOrchestrator:
         if self.dry_run:
             logger.info("*** DRY RUN MODE - No changes will be made ***")
         
+        # Set once catalogue generation is running alongside ontology population;
+        # cleared when its result has been consumed
+        catalogue_future = None
+        
         try:
             # Step 1: Validate configuration
             if 'validate' in steps_to_run:
@@ -559,7 +606,10 @@ class DataPipelineOrchestrator:
                 if not self.validate_output('data', self.outputs['data']):
                     return False
             
-            # Step 4: Populate ontology
+            # Step 4: Populate ontology (with the catalogue in a separate process)
+            if 'ontology' in steps_to_run and 'catalogue' in steps_to_run:
+                catalogue_future = self.start_catalogue_generation()
+            
             if 'ontology' in steps_to_run:
                 if not self.run_script('ontology population', self.scripts['ontology']):
                     logger.error("Ontology population failed")
@@ -572,7 +622,18 @@ class DataPipelineOrchestrator:
                 mindmap_needed = 'mindmap' in steps_to_run
                 catalogue_needed = 'catalogue' in steps_to_run
                 
-                if mindmap_needed and catalogue_needed:
+                if catalogue_future is not None:
+                    # Catalogue is already running - extract the mindmap meanwhile
+                    if mindmap_needed:
+                        if not self.run_script('mindmap extraction', self.scripts['mindmap']):
+                            logger.error("Mindmap extraction failed")
+                            return False
+                    catalogue_success = catalogue_future.result()
+                    catalogue_future = None
+                    if not catalogue_success:
+                        logger.error("Catalogue generation failed")
+                        return False
+                elif mindmap_needed and catalogue_needed:
                     # Run in parallel
                     mindmap_success, catalogue_success = self.run_parallel_steps()
                     
@@ -609,6 +670,12 @@ class DataPipelineOrchestrator:
             logger.error(f"Orchestration failed with error: {e}")
             logger.error(traceback.format_exc())
             return False
+        
+        finally:
+            # The pipeline stopped before consuming the background catalogue run;
+            # wait for it so its subprocess doesn't outlive the pipeline
+            if catalogue_future is not None:
+                self.wait_for_background_catalogue(catalogue_future)
 
 
 def main():